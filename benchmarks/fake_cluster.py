@@ -0,0 +1,521 @@
+#!/usr/bin/env python3
+# A local stand-in for the API server and Prometheus of a cluster, serving the generated fixtures
+# It answers discovery, GET and LIST requests (with selectors, pagination, and the metadata format),
+# pod logs, and the Prometheus query and rules endpoints, so that live mode can be load tested without a cluster
+# Usage: python -m benchmarks.fake_cluster --kubeconfig <path> [--scale small|medium|large] [--latency SECONDS]
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import collections
+import http.server
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+import yaml
+from benchmarks import fixtures
+from benchmarks import generate_must_gather
+from ocp_utils import selectors
+
+token = "fake-token"  # nosec
+metadata_as = "as=PartialObjectMetadataList"
+# A query that ends with a comparison only returns the series that are over a threshold, and a healthy cluster has none
+threshold_query = re.compile(r">\s*[0-9.]+\s*$")
+# (status, body, content type) of a response, an empty content type means JSON
+Response = Tuple[int, Any, str]
+# Called with the method, path, query parameters and Accept header of each request
+Handle = Callable[[str, str, Dict[str, str], str], Response]
+# The value of every series returned by a query, by the metric it asks for
+metric_values = {
+    "container_memory_working_set_bytes": "209715200",
+    "node_entropy_available_bits": "3500",
+}
+
+
+class FakeResource:
+    def __init__(
+        self,
+        api_version: str,
+        kind: str,
+        plural: str,
+        namespaced: bool,
+        items: Optional[List[fixtures.Object]] = None,
+    ) -> None:
+        self.api_version = api_version
+        self.kind = kind
+        self.plural = plural
+        self.namespaced = namespaced
+        self.items = items or []
+
+    def to_api_resource(self) -> Dict[str, Any]:
+        return {
+            "name": self.plural,
+            "singularName": self.kind.lower(),
+            "namespaced": self.namespaced,
+            "kind": self.kind,
+            "verbs": ["get", "list"],
+        }
+
+
+def _by_kind(items: List[fixtures.Object]) -> Dict[str, List[fixtures.Object]]:
+    grouped: Dict[str, List[fixtures.Object]] = {}
+    for item in items:
+        grouped.setdefault(item["kind"], []).append(item)
+    return grouped
+
+
+# Every kind that openshift-checks.py looks up, kinds without fixtures are served as empty lists
+def build_resources(scale: fixtures.Scale) -> List[FakeResource]:
+    random.seed(scale.seed)
+    objects: List[fixtures.Object] = []
+    objects.extend(fixtures.nodes(scale))
+    objects.extend(fixtures.namespaces(scale))
+    objects.extend(fixtures.pods(scale))
+    objects.extend(fixtures.events(scale))
+    for items in fixtures.cluster_resources(scale).values():
+        objects.extend(items)
+    objects.append(
+        {
+            "apiVersion": "route.openshift.io/v1",
+            "kind": "Route",
+            "metadata": {"name": "prometheus-k8s", "namespace": "openshift-monitoring"},
+            "spec": {"host": "prometheus-k8s-openshift-monitoring.apps.example.com"},
+        }
+    )
+    by_kind = _by_kind(objects)
+    return [
+        FakeResource(api_version, kind, plural, namespaced, by_kind.get(kind))
+        for api_version, kind, plural, namespaced in [
+            ("v1", "Event", "events", True),
+            ("v1", "Namespace", "namespaces", False),
+            ("v1", "Node", "nodes", False),
+            ("v1", "PersistentVolumeClaim", "persistentvolumeclaims", True),
+            ("v1", "Pod", "pods", True),
+            ("v1", "Secret", "secrets", True),
+            ("v1", "ServiceAccount", "serviceaccounts", True),
+            (
+                "apiextensions.k8s.io/v1",
+                "CustomResourceDefinition",
+                "customresourcedefinitions",
+                False,
+            ),
+            (
+                "certificates.k8s.io/v1",
+                "CertificateSigningRequest",
+                "certificatesigningrequests",
+                False,
+            ),
+            ("config.openshift.io/v1", "ClusterOperator", "clusteroperators", False),
+            ("config.openshift.io/v1", "ClusterVersion", "clusterversions", False),
+            ("config.openshift.io/v1", "DNS", "dnses", False),
+            ("config.openshift.io/v1", "Network", "networks", False),
+            (
+                "controlplane.operator.openshift.io/v1alpha1",
+                "PodNetworkConnectivityCheck",
+                "podnetworkconnectivitychecks",
+                True,
+            ),
+            (
+                "machineconfiguration.openshift.io/v1",
+                "KubeletConfig",
+                "kubeletconfigs",
+                False,
+            ),
+            (
+                "machineconfiguration.openshift.io/v1",
+                "MachineConfigPool",
+                "machineconfigpools",
+                False,
+            ),
+            (
+                "operators.coreos.com/v1alpha1",
+                "ClusterServiceVersion",
+                "clusterserviceversions",
+                True,
+            ),
+            ("operators.coreos.com/v1alpha1", "Subscription", "subscriptions", True),
+            ("route.openshift.io/v1", "Route", "routes", True),
+        ]
+    ]
+
+
+class FakeCluster:
+    def __init__(
+        self,
+        scale: fixtures.Scale,
+        latency: float = 0.0,
+        prometheus_latency: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        prometheus_port: int = 0,
+    ) -> None:
+        self.scale = scale
+        self.latency = latency
+        self.prometheus_latency = prometheus_latency
+        self.resources = build_resources(scale)
+        self.pods = {
+            (pod["metadata"]["namespace"], pod["metadata"]["name"]): pod
+            for resource in self.resources
+            if resource.kind == "Pod"
+            for pod in resource.items
+        }
+        # Number of requests served, by kind of request
+        self.requests: "collections.Counter[str]" = collections.Counter()
+        self._lock = threading.Lock()
+        self.api_server = http.server.ThreadingHTTPServer(
+            (host, port), _handler(self, self.handle_api)
+        )
+        self.prometheus_server = http.server.ThreadingHTTPServer(
+            (host, prometheus_port), _handler(self, self.handle_prometheus)
+        )
+        self.api_server.daemon_threads = True
+        self.prometheus_server.daemon_threads = True
+        self.url = f"http://{host}:{self.api_server.server_address[1]}"
+        self.prometheus_url = (
+            f"http://{host}:{self.prometheus_server.server_address[1]}"
+        )
+
+    def start(self) -> "FakeCluster":
+        for server in (self.api_server, self.prometheus_server):
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        return self
+
+    def shutdown(self) -> None:
+        for server in (self.api_server, self.prometheus_server):
+            server.shutdown()
+            server.server_close()
+
+    def write_kubeconfig(self, path: str) -> None:
+        with open(path, "w") as f:
+            yaml.safe_dump(
+                {
+                    "apiVersion": "v1",
+                    "kind": "Config",
+                    "clusters": [{"name": "fake", "cluster": {"server": self.url}}],
+                    "users": [{"name": "fake", "user": {"token": token}}],
+                    "contexts": [
+                        {"name": "fake", "context": {"cluster": "fake", "user": "fake"}}
+                    ],
+                    "current-context": "fake",
+                },
+                f,
+            )
+
+    def count(self, kind: str) -> None:
+        with self._lock:
+            self.requests[kind] += 1
+
+    def _api_groups(self) -> Dict[str, List[FakeResource]]:
+        groups: Dict[str, List[FakeResource]] = {}
+        for resource in self.resources:
+            groups.setdefault(resource.api_version, []).append(resource)
+        return groups
+
+    def handle_api(
+        self, method: str, path: str, params: Dict[str, str], accept: str
+    ) -> Response:
+        time.sleep(self.latency)
+        if path == "/version":
+            self.count("discovery")
+            return 200, {"major": "1", "minor": "27", "gitVersion": "v1.27.6"}, ""
+        if path == "/api":
+            self.count("discovery")
+            return 200, {"kind": "APIVersions", "versions": ["v1"]}, ""
+        if path == "/apis":
+            self.count("discovery")
+            groups = []
+            for api_version in self._api_groups():
+                if "/" not in api_version:
+                    continue
+                version = {
+                    "groupVersion": api_version,
+                    "version": api_version.split("/")[1],
+                }
+                groups.append(
+                    {
+                        "name": api_version.split("/")[0],
+                        "versions": [version],
+                        "preferredVersion": version,
+                    }
+                )
+            return (
+                200,
+                {"kind": "APIGroupList", "apiVersion": "v1", "groups": groups},
+                "",
+            )
+
+        parts = path.strip("/").split("/")
+        if parts[0] == "api":
+            api_version, rest = parts[1], parts[2:]
+        elif parts[0] == "apis" and len(parts) >= 3:
+            api_version, rest = f"{parts[1]}/{parts[2]}", parts[3:]
+        else:
+            return _not_found(path)
+        resources = self._api_groups().get(api_version)
+        if resources is None:
+            return _not_found(path)
+        if not rest:
+            self.count("discovery")
+            return (
+                200,
+                {
+                    "kind": "APIResourceList",
+                    "groupVersion": api_version,
+                    "resources": [resource.to_api_resource() for resource in resources]
+                    + [
+                        {
+                            "name": "pods/log",
+                            "namespaced": True,
+                            "kind": "Pod",
+                            "verbs": ["get"],
+                        },
+                        {
+                            "name": "serviceaccounts/token",
+                            "namespaced": True,
+                            "kind": "TokenRequest",
+                            "verbs": ["create"],
+                        },
+                    ],
+                },
+                "",
+            )
+
+        namespace = ""
+        if rest[0] == "namespaces" and len(rest) >= 3:
+            namespace, rest = rest[1], rest[2:]
+        plural, name, subresource = (rest + ["", ""])[:3]
+        resource = next((item for item in resources if item.plural == plural), None)
+        if resource is None:
+            return _not_found(path)
+        if method == "POST" and subresource == "token":
+            self.count("token")
+            return 201, {"kind": "TokenRequest", "status": {"token": token}}, ""
+        if subresource == "log":
+            self.count("log")
+            pod = self.pods.get((namespace, name))
+            if pod is None:
+                return _not_found(path)
+            return 200, fixtures.pod_log(pod, self.scale), "text/plain"
+
+        items = [
+            item
+            for item in resource.items
+            if not namespace or item["metadata"].get("namespace") == namespace
+        ]
+        if name:
+            self.count("get")
+            item = next(
+                (item for item in items if item["metadata"]["name"] == name), None
+            )
+            if item is None:
+                return _not_found(path)
+            return 200, item, ""
+        self.count("list")
+        return 200, self.list_response(resource, items, params, accept), ""
+
+    def list_response(
+        self,
+        resource: FakeResource,
+        items: List[fixtures.Object],
+        params: Dict[str, str],
+        accept: str,
+    ) -> Dict[str, Any]:
+        items = selectors.filter_items(
+            items, params.get("labelSelector", ""), params.get("fieldSelector", "")
+        )
+        # The continue token is the offset of the next page
+        start = int(params.get("continue") or 0)
+        limit = int(params.get("limit") or 0)
+        end = start + limit if limit else len(items)
+        metadata: Dict[str, Any] = {"resourceVersion": "1"}
+        if end < len(items):
+            metadata["continue"] = str(end)
+        page = items[start:end]
+        if metadata_as in accept:
+            return {
+                "kind": "PartialObjectMetadataList",
+                "apiVersion": "meta.k8s.io/v1",
+                "metadata": metadata,
+                "items": [_partial_object(item) for item in page],
+            }
+        return {
+            "kind": f"{resource.kind}List",
+            "apiVersion": resource.api_version,
+            "metadata": metadata,
+            "items": page,
+        }
+
+    def handle_prometheus(
+        self, method: str, path: str, params: Dict[str, str], accept: str
+    ) -> Response:
+        time.sleep(self.prometheus_latency)
+        if path == "/api/v1/rules":
+            self.count("prometheus rules")
+            return (
+                200,
+                {"status": "success", "data": {"groups": fixtures.alerting_rules()}},
+                "",
+            )
+        if path != "/api/v1/query":
+            return _not_found(path)
+        self.count("prometheus query")
+        query = params.get("query", "")
+        result = []
+        if not threshold_query.search(query):
+            value = next(
+                (value for metric, value in metric_values.items() if metric in query),
+                "0.05",
+            )
+            for i, node in enumerate(fixtures.node_names(self.scale)):
+                result.append(
+                    {
+                        "metric": {
+                            "instance": node,
+                            "node": node,
+                            "pod": f"ovnkube-node-{i}",
+                            "device": "eth0",
+                        },
+                        "value": [time.time(), value],
+                    }
+                )
+        return (
+            200,
+            {"status": "success", "data": {"resultType": "vector", "result": result}},
+            "",
+        )
+
+
+def _partial_object(item: fixtures.Object) -> Dict[str, Any]:
+    return {
+        "kind": "PartialObjectMetadata",
+        "apiVersion": "meta.k8s.io/v1",
+        "metadata": item["metadata"],
+    }
+
+
+def _not_found(path: str) -> Response:
+    return (
+        404,
+        {
+            "kind": "Status",
+            "apiVersion": "v1",
+            "status": "Failure",
+            "reason": "NotFound",
+            "message": f"{path} not found",
+            "code": 404,
+        },
+        "",
+    )
+
+
+def _handler(cluster: FakeCluster, handle: Handle) -> Any:
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # The headers and the body are written separately, without this each response waits for a delayed ACK
+        disable_nagle_algorithm = True
+
+        def respond(self, method: str) -> None:
+            url = urllib.parse.urlsplit(self.path)
+            params = dict(urllib.parse.parse_qsl(url.query))
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                body = self.rfile.read(length).decode()
+                if self.headers.get("Content-Type", "").startswith(
+                    "application/x-www-form-urlencoded"
+                ):
+                    params.update(urllib.parse.parse_qsl(body))
+            if self.headers.get("Authorization") != f"Bearer {token}":
+                status, content, content_type = 401, {"kind": "Status", "code": 401}, ""
+            else:
+                status, content, content_type = handle(
+                    method, url.path, params, self.headers.get("Accept", "")
+                )
+            data = (
+                content.encode()
+                if isinstance(content, str)
+                else json.dumps(content).encode()
+            )
+            self.send_response(status)
+            self.send_header("Content-Type", content_type or "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self) -> None:
+            self.respond("GET")
+
+        def do_POST(self) -> None:
+            self.respond("POST")
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Serve a fake cluster API and Prometheus from generated fixtures"
+    )
+    generate_must_gather.add_scale_args(parser)
+    parser.add_argument(
+        "--kubeconfig",
+        type=str,
+        required=True,
+        help="Where to write a kubeconfig that points to the fake cluster",
+    )
+    parser.add_argument(
+        "--host", type=str, default="127.0.0.1", help="Address to listen on"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=0,
+        help="Port of the API server. Default=any free port",
+    )
+    parser.add_argument(
+        "--prometheus-port",
+        type=int,
+        default=0,
+        help="Port of Prometheus. Default=any free port",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Seconds added to each API request. Default=0",
+    )
+    parser.add_argument(
+        "--prometheus-latency",
+        type=float,
+        default=0.0,
+        help="Seconds added to each Prometheus request. Default=0",
+    )
+    args = parser.parse_args()
+    cluster = FakeCluster(
+        generate_must_gather.scale_from_args(args),
+        latency=args.latency,
+        prometheus_latency=args.prometheus_latency,
+        host=args.host,
+        port=args.port,
+        prometheus_port=args.prometheus_port,
+    )
+    cluster.write_kubeconfig(args.kubeconfig)
+    print(f"API server: {cluster.url}")
+    print(f"Prometheus: {cluster.prometheus_url}")
+    print(
+        f"Run: KUBECONFIG={args.kubeconfig} ./openshift-checks.py --skip-oc-debug --prometheus-url {cluster.prometheus_url}"
+    )
+    cluster.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for kind, count in sorted(cluster.requests.items()):
+            print(f"{kind}: {count} requests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+# Generated cluster objects, shaped like the ones of a real OpenShift cluster
+# The same objects are written to synthetic must-gathers, and served by the fake API server
+from typing import Any, Dict, List, Optional, Tuple
+import random
+
+Object = Dict[str, Any]
+
+timestamp = "2024-01-01T10:00:00Z"
+log_line = "2024-01-01T09:59:59.000Z|00001|binding|INFO|Claiming lport {pod} for this chassis.\n"
+thrasing_line = "2024-01-01T09:59:59.000Z|00002|binding|INFO|Changing chassis for lport {pod} from node0 to node1.\n"
+
+
+class Scale:
+    def __init__(
+        self,
+        nodes: int = 6,
+        namespaces: int = 20,
+        pods_per_namespace: int = 10,
+        events_per_namespace: int = 20,
+        log_lines: int = 100,
+        seed: int = 0,
+    ) -> None:
+        self.nodes = nodes
+        self.namespaces = namespaces
+        self.pods_per_namespace = pods_per_namespace
+        self.events_per_namespace = events_per_namespace
+        self.log_lines = log_lines
+        self.seed = seed
+
+    def to_dict(self) -> Dict[str, int]:
+        return dict(vars(self))
+
+
+scales = {
+    "small": Scale(),
+    "medium": Scale(
+        nodes=30, namespaces=100, pods_per_namespace=30, events_per_namespace=50
+    ),
+    "large": Scale(
+        nodes=120,
+        namespaces=300,
+        pods_per_namespace=100,
+        events_per_namespace=100,
+        log_lines=1000,
+    ),
+}
+
+
+def _condition(condition_type: str, status: str, message: str = "") -> Object:
+    condition: Object = {
+        "type": condition_type,
+        "status": status,
+        "lastTransitionTime": timestamp,
+    }
+    if message:
+        condition["message"] = message
+    return condition
+
+
+def _metadata(
+    name: str, namespace: str = "", labels: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    metadata: Dict[str, Any] = {
+        "name": name,
+        "uid": f"{random.getrandbits(128):032x}",  # nosec
+        "resourceVersion": str(random.randint(1000, 999999)),  # nosec
+        "creationTimestamp": timestamp,
+        "labels": dict(labels or {}),
+        # Real objects carry a lot of fields that the checks never read
+        "managedFields": [
+            {
+                "manager": "kube-controller-manager",
+                "operation": "Update",
+                "apiVersion": "v1",
+                "time": timestamp,
+                "fieldsType": "FieldsV1",
+                "fieldsV1": {"f:metadata": {"f:labels": {".": {}}}},
+            }
+        ],
+    }
+    if namespace:
+        metadata["namespace"] = namespace
+    return metadata
+
+
+def node_names(scale: Scale) -> List[str]:
+    return [f"worker-{i}" if i >= 3 else f"master-{i}" for i in range(scale.nodes)]
+
+
+def namespace_names(scale: Scale) -> List[str]:
+    names = ["openshift-ovn-kubernetes", "openshift-monitoring", "openshift-dns"]
+    names.extend(f"app-{i}" for i in range(max(scale.namespaces - len(names), 0)))
+    return names[: scale.namespaces]
+
+
+def nodes(scale: Scale) -> List[Object]:
+    items = []
+    for name in node_names(scale):
+        master = name.startswith("master")
+        role = "master" if master else "worker"
+        items.append(
+            {
+                "apiVersion": "v1",
+                "kind": "Node",
+                "metadata": _metadata(
+                    name,
+                    labels={
+                        f"node-role.kubernetes.io/{role}": "",
+                        "kubernetes.io/hostname": name,
+                    },
+                ),
+                "spec": {
+                    "taints": (
+                        [
+                            {
+                                "key": "node-role.kubernetes.io/master",
+                                "effect": "NoSchedule",
+                            }
+                        ]
+                        if master
+                        else []
+                    )
+                },
+                "status": {
+                    "conditions": [
+                        _condition("MemoryPressure", "False"),
+                        _condition("DiskPressure", "False"),
+                        _condition("PIDPressure", "False"),
+                        _condition("Ready", "True"),
+                    ],
+                    "nodeInfo": {"kernelVersion": "5.14.0-284.25.1.el9_2.x86_64"},
+                    "capacity": {"cpu": "16", "memory": "65536Mi", "pods": "250"},
+                    "allocatable": {
+                        "cpu": "15500m",
+                        "memory": "60000Mi",
+                        "pods": "250",
+                    },
+                },
+            }
+        )
+    return items
+
+
+def namespaces(scale: Scale) -> List[Object]:
+    return [
+        {
+            "apiVersion": "v1",
+            "kind": "Namespace",
+            "metadata": _metadata(name),
+            "status": {"phase": "Active"},
+        }
+        for name in namespace_names(scale)
+    ]
+
+
+def _container_name(namespace: str) -> str:
+    return "ovn-controller" if namespace == "openshift-ovn-kubernetes" else "app"
+
+
+def pods(scale: Scale) -> List[Object]:
+    items = []
+    node_list = node_names(scale)
+    for namespace in namespace_names(scale):
+        app = "ovnkube-node" if namespace == "openshift-ovn-kubernetes" else "web"
+        for i in range(scale.pods_per_namespace):
+            name = f"{app}-{i}"
+            # Most pods are healthy, a few are failing or restarting, like on a real cluster
+            phase = "Running" if random.random() > 0.02 else "Pending"  # nosec
+            restarted = random.random() < 0.05  # nosec
+            container_status: Object = {
+                "name": _container_name(namespace),
+                "ready": phase == "Running",
+                "restartCount": 1 if restarted else 0,
+                "image": "quay.io/openshift/example:latest",
+                "state": {"running": {"startedAt": timestamp}},
+                "lastState": (
+                    {
+                        "terminated": {
+                            "reason": "Error",
+                            "exitCode": 1,
+                            "finishedAt": timestamp,
+                        }
+                    }
+                    if restarted
+                    else {}
+                ),
+            }
+            items.append(
+                {
+                    "apiVersion": "v1",
+                    "kind": "Pod",
+                    "metadata": _metadata(
+                        name, namespace, labels={"app": app, "pod-index": str(i)}
+                    ),
+                    "spec": {
+                        "nodeName": node_list[i % len(node_list)],
+                        "containers": [
+                            {
+                                "name": _container_name(namespace),
+                                "image": "quay.io/openshift/example:latest",
+                                "env": [
+                                    {"name": f"VAR_{j}", "value": f"value-{j}"}
+                                    for j in range(10)
+                                ],
+                                "resources": {
+                                    "requests": {"cpu": "10m", "memory": "50Mi"}
+                                },
+                            }
+                        ],
+                    },
+                    "status": {
+                        "phase": phase,
+                        "conditions": [
+                            _condition("PodScheduled", "True"),
+                            _condition(
+                                "Ready",
+                                "True" if phase == "Running" else "False",
+                                "" if phase == "Running" else "containers not ready",
+                            ),
+                        ],
+                        "containerStatuses": [container_status],
+                    },
+                }
+            )
+    return items
+
+
+def events(scale: Scale) -> List[Object]:
+    items = []
+    for namespace in namespace_names(scale):
+        for i in range(scale.events_per_namespace):
+            warning = random.random() < 0.1  # nosec
+            items.append(
+                {
+                    "apiVersion": "v1",
+                    "kind": "Event",
+                    "metadata": _metadata(f"event-{i}", namespace),
+                    "type": "Warning" if warning else "Normal",
+                    "reason": "BackOff" if warning else "Pulled",
+                    "message": (
+                        "Back-off restarting failed container"
+                        if warning
+                        else "Container image already present on machine"
+                    ),
+                    "lastTimestamp": timestamp,
+                    "involvedObject": {
+                        "kind": "Pod",
+                        "name": f"web-{i % max(scale.pods_per_namespace, 1)}",
+                        "namespace": namespace,
+                    },
+                }
+            )
+    return items
+
+
+def pod_log(pod: Object, scale: Scale) -> str:
+    name = pod["metadata"]["name"]
+    lines = [log_line.format(pod=name)] * scale.log_lines
+    if pod["metadata"]["namespace"] == "openshift-ovn-kubernetes":
+        lines.extend([thrasing_line.format(pod=name)] * random.randint(0, 20))  # nosec
+    return "".join(lines)
+
+
+# Cluster scoped objects that every cluster has, grouped by (api group, plural)
+def cluster_resources(scale: Scale) -> Dict[Tuple[str, str], List[Object]]:
+    return {
+        ("config.openshift.io", "networks"): [
+            {
+                "apiVersion": "config.openshift.io/v1",
+                "kind": "Network",
+                "metadata": _metadata("cluster"),
+                "spec": {
+                    "networkType": "OVNKubernetes",
+                    "clusterNetwork": [{"cidr": "10.128.0.0/14", "hostPrefix": 23}],
+                },
+            }
+        ],
+        ("config.openshift.io", "dnses"): [
+            {
+                "apiVersion": "config.openshift.io/v1",
+                "kind": "DNS",
+                "metadata": _metadata("cluster"),
+                "spec": {"baseDomain": "bench.example.com"},
+            }
+        ],
+        ("config.openshift.io", "clusterversions"): [
+            {
+                "apiVersion": "config.openshift.io/v1",
+                "kind": "ClusterVersion",
+                "metadata": _metadata("version"),
+                "spec": {"channel": "stable-4.14"},
+                "status": {
+                    "conditions": [_condition("Failing", "False")],
+                    "desired": {"version": "4.14.1"},
+                    "availableUpdates": [{"version": "4.14.5"}],
+                },
+            }
+        ],
+        ("config.openshift.io", "clusteroperators"): [
+            {
+                "apiVersion": "config.openshift.io/v1",
+                "kind": "ClusterOperator",
+                "metadata": _metadata(name),
+                "status": {
+                    "conditions": [
+                        _condition("Degraded", "False"),
+                        _condition("Progressing", "False"),
+                        _condition("Available", "True"),
+                    ]
+                },
+            }
+            for name in ("dns", "network", "monitoring", "ingress", "etcd")
+        ],
+        ("machineconfiguration.openshift.io", "machineconfigpools"): [
+            {
+                "apiVersion": "machineconfiguration.openshift.io/v1",
+                "kind": "MachineConfigPool",
+                "metadata": _metadata(name),
+                "status": {"degradedMachineCount": 0},
+            }
+            for name in ("master", "worker")
+        ],
+        ("certificates.k8s.io", "certificatesigningrequests"): [
+            {
+                "apiVersion": "certificates.k8s.io/v1",
+                "kind": "CertificateSigningRequest",
+                "metadata": _metadata(f"csr-{i}"),
+                "spec": {"signerName": "kubernetes.io/kubelet-serving"},
+                "status": {"conditions": [_condition("Approved", "True")]},
+            }
+            for i in range(scale.nodes)
+        ],
+    }
+
+
+def alerting_rules() -> List[Object]:
+    return [
+        {
+            "name": "general.rules",
+            "rules": [
+                {
+                    "type": "alerting",
+                    "state": "firing",
+                    "name": "Watchdog",
+                    "alerts": [
+                        {
+                            "labels": {"alertname": "Watchdog", "severity": "none"},
+                            "annotations": {
+                                "summary": "An alert that should always be firing"
+                            },
+                        }
+                    ],
+                }
+            ],
+        }
+    ]
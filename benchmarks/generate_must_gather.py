@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# Writes a synthetic must-gather, with the same layout as the ones created by "oc adm must-gather"
+# Usage: python -m benchmarks.generate_must_gather <output folder> [--scale small|medium|large] [--pods-per-namespace N ...]
+from typing import Any, Dict, List
+import argparse
+import json
+import os
+import random
+import yaml
+from benchmarks import fixtures
+
+try:
+    from yaml import CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeDumper  # type: ignore
+
+image_folder = "quay-io-openshift-release-dev-ocp-v4-0-art-dev-sha256-0000"
+
+
+def _write(root: str, relpath: str, content: str) -> None:
+    path = os.path.join(root, relpath)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def _write_yaml(root: str, relpath: str, obj: Any) -> None:
+    _write(root, relpath, yaml.dump(obj, Dumper=SafeDumper))
+
+
+def _write_list(
+    root: str, relpath: str, kind: str, items: List[Dict[str, Any]]
+) -> None:
+    _write_yaml(
+        root,
+        relpath,
+        {"apiVersion": "v1", "kind": f"{kind}List", "items": items},
+    )
+
+
+# Returns the path of the must-gather, which is the folder that was given
+def generate(path: str, scale: fixtures.Scale) -> str:
+    random.seed(scale.seed)
+    root = os.path.join(path, image_folder)
+    _write(root, "timestamp", "2024-01-01 10:00:00.000000000 +0000 UTC m=+0.1\n")
+
+    for node in fixtures.nodes(scale):
+        _write_yaml(
+            root,
+            f"cluster-scoped-resources/core/nodes/{node['metadata']['name']}.yaml",
+            node,
+        )
+    # Like in a real must-gather, each kind has a folder in the folder of its API group
+    for (group, plural), items in fixtures.cluster_resources(scale).items():
+        for item in items:
+            _write_yaml(
+                root,
+                f"cluster-scoped-resources/{group}/{plural}/{item['metadata']['name']}.yaml",
+                item,
+            )
+
+    pods_by_namespace: Dict[str, List[Dict[str, Any]]] = {}
+    for pod in fixtures.pods(scale):
+        pods_by_namespace.setdefault(pod["metadata"]["namespace"], []).append(pod)
+    events_by_namespace: Dict[str, List[Dict[str, Any]]] = {}
+    for event in fixtures.events(scale):
+        events_by_namespace.setdefault(event["metadata"]["namespace"], []).append(event)
+
+    for namespace in fixtures.namespaces(scale):
+        name = namespace["metadata"]["name"]
+        _write_yaml(root, f"namespaces/{name}/{name}.yaml", namespace)
+        pods = pods_by_namespace.get(name, [])
+        _write_list(root, f"namespaces/{name}/core/pods.yaml", "Pod", pods)
+        _write_list(
+            root,
+            f"namespaces/{name}/core/events.yaml",
+            "Event",
+            events_by_namespace.get(name, []),
+        )
+        for pod in pods:
+            pod_name = pod["metadata"]["name"]
+            _write_yaml(root, f"namespaces/{name}/pods/{pod_name}/{pod_name}.yaml", pod)
+            for container in pod["spec"]["containers"]:
+                _write(
+                    root,
+                    f"namespaces/{name}/pods/{pod_name}/{container['name']}/{container['name']}/logs/current.log",
+                    fixtures.pod_log(pod, scale),
+                )
+
+    _write(
+        root,
+        "monitoring/prometheus/rules.json",
+        json.dumps(
+            {"status": "success", "data": {"groups": fixtures.alerting_rules()}}
+        ),
+    )
+    return path
+
+
+def add_scale_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--scale",
+        choices=fixtures.scales.keys(),
+        default="small",
+        help="Preset size of the generated cluster. Default=small",
+    )
+    for option in (
+        "nodes",
+        "namespaces",
+        "pods_per_namespace",
+        "events_per_namespace",
+        "log_lines",
+        "seed",
+    ):
+        parser.add_argument(
+            f"--{option.replace('_', '-')}",
+            type=int,
+            help="Overrides the value of the preset",
+        )
+
+
+def scale_from_args(args: argparse.Namespace) -> fixtures.Scale:
+    values = fixtures.scales[args.scale].to_dict()
+    for option in values:
+        if getattr(args, option) is not None:
+            values[option] = getattr(args, option)
+    return fixtures.Scale(**values)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic must-gather")
+    parser.add_argument("output", type=str, help="Folder to write the must-gather to")
+    add_scale_args(parser)
+    args = parser.parse_args()
+    generate(args.output, scale_from_args(args))
+
+
+if __name__ == "__main__":
+    main()
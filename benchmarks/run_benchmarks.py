@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# Times reading a must-gather, MustGather.get() with selectors, and each check, against a synthetic must-gather
+# With --live, the same steps run against benchmarks.fake_cluster instead, through the API server code path
+# Every repetition runs in a new process, so nothing that was loaded or cached by one run is reused by the next
+# Results are written to benchmarks/results/<commit>-<scale>[-live].json, and can be compared with the results of another commit
+# Usage: python -m benchmarks.run_benchmarks [--scale small|medium|large] [--repeat N] [--live] [--compare results.json]
+from typing import Any, Callable, Dict, List
+import argparse
+import concurrent.futures
+import contextlib
+import importlib.util
+import io
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess  # nosec
+import sys
+import tempfile
+import time
+from tabulate import tabulate
+from benchmarks import fake_cluster
+from benchmarks import generate_must_gather
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+results_dir = os.path.join(repo_root, "benchmarks", "results")
+
+# (name, namespace, label_selector, field_selector) of the Pod.get() calls that are timed
+selector_queries = [
+    ("all pods", "", "", ""),
+    ("pods in a namespace", "app-0", "", ""),
+    ("pods by label", "", "app=web", ""),
+    ("pods by field", "", "", "status.phase!=Running"),
+    ("pods by label and field", "", "app=ovnkube-node", "spec.nodeName=worker-3"),
+]
+
+
+# openshift-checks.py can't be imported by name because of the dash
+def load_cli() -> Any:
+    spec = importlib.util.spec_from_file_location(
+        "openshift_checks", os.path.join(repo_root, "openshift-checks.py")
+    )
+    if spec is None or spec.loader is None:
+        raise ImportError("openshift-checks.py not found")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _time(fn: Callable[[], Any], number: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter() - start) / number
+
+
+# Runs in its own process with the given openshift-checks.py arguments, returns the time in seconds of each step
+def run_once(argv: List[str]) -> Dict[str, float]:
+    import ocp_utils
+
+    cli = load_cli()
+    sys.argv = ["openshift-checks.py", "-n", "-r", "--no-cache"] + argv
+    args = cli.parse_args()
+    if args.must_gather:
+        args.skip_oc_debug = True
+        args.skip_prometheus = True
+    # Requests to the fake cluster take much longer than reading from memory, so they are only timed once
+    number = 10 if args.must_gather else 1
+    results: Dict[str, float] = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        results["init"] = _time(lambda: ocp_utils.utils.init(args))
+        results["load pods"] = _time(ocp_utils.api.Pod.get)
+        for name, namespace, label_selector, field_selector in selector_queries:
+            results[f"Pod.get {name}"] = _time(
+                lambda: ocp_utils.api.Pod.get(
+                    namespace=namespace or None,
+                    label_selector=label_selector,
+                    field_selector=field_selector,
+                ),
+                number=number,
+            )
+        for fn in cli.funcs:
+            check_name = ocp_utils.runner.check_name(fn)
+            results[f"check {check_name}"] = _time(
+                lambda: ocp_utils.runner.run_check(fn, args)
+            )
+    return results
+
+
+def current_commit() -> str:
+    try:
+        return (
+            subprocess.run(  # nosec
+                ["git", "rev-parse", "--short", "HEAD"],
+                capture_output=True,
+                check=True,
+                cwd=repo_root,
+            )
+            .stdout.decode()
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def summarize(runs: List[Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    return {
+        name: {
+            "min": min(run[name] for run in runs),
+            "median": statistics.median(run[name] for run in runs),
+        }
+        for name in runs[0]
+    }
+
+
+def print_results(
+    results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]]
+) -> None:
+    rows = []
+    for name, result in results.items():
+        row: List[Any] = [name, result["min"] * 1000, result["median"] * 1000]
+        if baseline:
+            old = baseline.get(name)
+            if old and old["median"] > 0:
+                row.append(old["median"] * 1000)
+                row.append((result["median"] / old["median"] - 1) * 100)
+            else:
+                row.extend(["", ""])
+        rows.append(row)
+    table_headers = ["STEP", "MIN (MS)", "MEDIAN (MS)"]
+    if baseline:
+        table_headers.extend(["BASELINE MEDIAN (MS)", "CHANGE (%)"])
+    print(tabulate(rows, headers=table_headers, floatfmt=".2f"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark must-gather loading and the checks"
+    )
+    generate_must_gather.add_scale_args(parser)
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="How many times each step is run. Default=3",
+    )
+    parser.add_argument(
+        "-m",
+        "--must-gather",
+        type=str,
+        help="Benchmark this must-gather instead of generating one",
+    )
+    parser.add_argument(
+        "--live",
+        action="store_true",
+        help="Run against a local fake API server and Prometheus instead of a must-gather",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Seconds added to each request to the fake API server and Prometheus. Default=0",
+    )
+    parser.add_argument(
+        "--compare", type=str, help="Results file of an earlier run to compare with"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        help="Where to write the results. Default=benchmarks/results/<commit>-<scale>[-live].json",
+    )
+    args = parser.parse_args()
+    scale = generate_must_gather.scale_from_args(args)
+
+    cluster = None
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.live:
+            cluster = fake_cluster.FakeCluster(
+                scale, latency=args.latency, prometheus_latency=args.latency
+            ).start()
+            kubeconfig = os.path.join(tmp, "kubeconfig")
+            cluster.write_kubeconfig(kubeconfig)
+            # The benchmark processes inherit the environment when they start
+            os.environ["KUBECONFIG"] = kubeconfig
+            argv = ["--skip-oc-debug", "--prometheus-url", cluster.prometheus_url]
+        else:
+            mg_path = args.must_gather
+            if not mg_path:
+                print(f"Generating a {args.scale} must-gather...")
+                mg_path = generate_must_gather.generate(os.path.join(tmp, "mg"), scale)
+            argv = ["-m", mg_path]
+        runs = []
+        for i in range(args.repeat):
+            print(f"Run {i + 1}/{args.repeat}...")
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                runs.append(executor.submit(run_once, argv).result())
+        if cluster is not None:
+            cluster.shutdown()
+
+    commit = current_commit()
+    results = summarize(runs)
+    name = f"{commit}-{args.scale}{'-live' if args.live else ''}.json"
+    output = args.output or os.path.join(results_dir, name)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(
+            {
+                "commit": commit,
+                "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "cpus": os.cpu_count(),
+                "must_gather": args.must_gather or "",
+                "scale": scale.to_dict() if not args.must_gather else {},
+                "live": args.live,
+                "latency": args.latency if args.live else 0,
+                # Requests served by the fake cluster over all runs, by kind of request
+                "requests": dict(cluster.requests) if cluster is not None else {},
+                "repeat": args.repeat,
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+
+    baseline: Dict[str, Dict[str, float]] = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    print()
+    print_results(results, baseline)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
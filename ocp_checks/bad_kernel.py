@@ -10,12 +10,12 @@ bad_kernels = [{"bug": "bz1948052", "kernel": "4.18.0-193.24.1.el8_2.dt1.x86_64"
 def do_check(args: argparse.Namespace) -> str:
     passed = True
     kernel_list: List[List[str]] = []
-    for node in ocp_utils.utils.nodes:  # type: Dict[str, Any]
+    for node in ocp_utils.utils.nodes:
         for bad_kernel in bad_kernels:  # type: Dict[str, str]
-            if node["status"]["nodeInfo"]["kernelVersion"] == bad_kernel["kernel"]:
+            if node.kernel_version == bad_kernel["kernel"]:
                 kernel_list.append(
                     [
-                        node["metadata"]["name"],
+                        node.name,
                         bad_kernel["bug"],
                         f"{ocp_utils.utils.oc_colors['RED']}{bad_kernel['kernel']}{ocp_utils.utils.oc_colors['ENDC']}",
                     ]
@@ -8,9 +8,9 @@ from typing import Dict, Any, List  # noqa F401
 def do_check(args: argparse.Namespace) -> str:
     passed = True
     pending_csrs: List[List[str]] = []
-    for csr in ocp_utils.api.CertificateSigningRequest.get()[
-        "items"
-    ]:  # type: Dict[str, Any]
+    for csr in ocp_utils.snapshot.iter_items(
+        "CertificateSigningRequest"
+    ):  # type: Dict[str, Any]
         if not csr.get("status"):
             pending_csrs.append([csr["metadata"]["name"]])
 
@@ -12,11 +12,12 @@ def do_check(args: argparse.Namespace) -> str:
 
     passed = True
     scheduable_controllers: List[List[str]] = []
-    for node in ocp_utils.utils.nodes:  # type: Dict[str, Any]
-        if node["metadata"]["labels"].get(
-            "node-role.kubernetes.io/master"
-        ) == "" and not node["spec"].get("taints"):
-            scheduable_controllers.append([node["metadata"]["name"]])
+    for node in ocp_utils.utils.nodes:
+        if (
+            node.labels.get("node-role.kubernetes.io/master") == ""
+            and not node.has_taints
+        ):
+            scheduable_controllers.append([node.name])
 
     if scheduable_controllers:
         passed = False
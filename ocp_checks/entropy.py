@@ -12,16 +12,15 @@ def do_check(args: argparse.Namespace) -> str:
 
     passed = True
     bad_nodes: List[List[str]] = []
-    for node in ocp_utils.utils.nodes:  # type: Dict[str, Any]
-        entropy_bits = Decimal(
-            ocp_utils.api.do_prom_query(
-                f'node_entropy_available_bits{{instance="{node["metadata"]["name"]}"}}'
-            )[0]["value"][1]
-        )
+    node_entropy = ocp_utils.api.do_prom_query_map(
+        "max by (instance) (node_entropy_available_bits)", "instance"
+    )
+    for node in ocp_utils.utils.nodes:
+        entropy_bits = Decimal(node_entropy[node.name])
         if entropy_bits < Decimal(args.entropy_threshold):
             bad_nodes.append(
                 [
-                    node["metadata"]["name"],
+                    node.name,
                     f"{ocp_utils.utils.oc_colors['RED']}{entropy_bits}{ocp_utils.utils.oc_colors['ENDC']}",
                 ]
             )
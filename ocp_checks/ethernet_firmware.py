@@ -3,9 +3,8 @@
 # See this for Mellanox (Supported HCAs Firmware Versions): https://network.nvidia.com/pdf/prod_software/Red_Hat_Enterprise_Linux_(RHEL)_8.4_Driver_Release_Notes.pdf
 import ocp_utils
 import argparse
-import concurrent.futures
-import subprocess  # nosec
-from typing import Dict, List, Any  # noqa F401
+from kubernetes import dynamic
+from typing import Dict, List, Any, Optional  # noqa F401
 from packaging import version
 from tabulate import tabulate
 
@@ -31,26 +30,69 @@ firmware_mins: Dict[str, str] = {
 }
 
 
+# The result of _physical_interface_firmwares, or what it raised, so that it is only looked up once per run
+_interface_firmwares: Optional[Dict[str, Dict[str, str]]] = None
+_interface_firmwares_error: Optional[Exception] = None
+
+
+# node name -> interface name -> minimum firmware, for the physical interfaces whose minimum firmware is known
+def physical_interface_firmwares() -> Dict[str, Dict[str, str]]:
+    global _interface_firmwares, _interface_firmwares_error
+    if _interface_firmwares_error is not None:
+        raise _interface_firmwares_error
+    if _interface_firmwares is None:
+        try:
+            _interface_firmwares = _physical_interface_firmwares()
+        except Exception as e:
+            _interface_firmwares_error = e
+            raise
+    return _interface_firmwares
+
+
+def _physical_interface_firmwares() -> Dict[str, Dict[str, str]]:
+    interface_firmwares: Dict[str, Dict[str, str]] = {}
+    if not ocp_utils.utils.supports_sriov():
+        return interface_firmwares
+    try:
+        sriov_states = ocp_utils.api.SriovNetworkNodeState.get(
+            namespace="openshift-sriov-network-operator",
+        )
+    except dynamic.exceptions.ResourceNotFoundError:
+        return interface_firmwares
+    for sriov_state in sriov_states["items"]:  # type: Dict[str, Any]
+        interface_firmwares[sriov_state["metadata"]["name"]] = {}
+        for interface in sriov_state["status"]["interfaces"]:  # type: Dict[str, str]
+            if (
+                firmware_mins.get(
+                    f"{interface['vendor']}:{interface['deviceID']}", "0.0"
+                )
+                != "0.0"
+            ):
+                # We only add physical interfaces to the list if we know the minimum firmware
+                interface_firmwares[sriov_state["metadata"]["name"]][
+                    interface["name"]
+                ] = firmware_mins[f"{interface['vendor']}:{interface['deviceID']}"]
+    return interface_firmwares
+
+
+# Only runs on nodes where we have found supported interfaces, and where we know the minimum firmware for those interfaces
+def firmware_command(node_name: str) -> Optional[str]:
+    interfaces = physical_interface_firmwares().get(node_name)
+    if not interfaces:
+        return None
+    return f"for interface in {' '.join(interfaces.keys())}; do echo START: $interface; ethtool -i $interface; done"
+
+
+ocp_utils.nodeprobe.register(
+    "ethernet_firmware", firmware_command, check="ethernet_firmware"
+)
+
+
 def check_node_firmware(
-    node_name: str, physical_interface_firmwares: Dict[str, str]
+    node_name: str, physical_interface_firmwares: Dict[str, str], output: str
 ) -> List[List[str]]:
-    output = subprocess.run(  # nosec
-        [
-            "oc",
-            "debug",
-            f"node/{node_name}",
-            "--",
-            "chroot",
-            "/host",
-            "sh",
-            "-c",
-            f"for interface in {' '.join(physical_interface_firmwares.keys())}; do echo START: $interface; ethtool -i $interface; done",
-        ],
-        capture_output=True,
-    )
-
     firmwares: List[Dict[str, str]] = []
-    for line in output.stdout.decode().splitlines():  # type: str
+    for line in output.splitlines():  # type: str
         if line.startswith("START: "):
             firmwares.append({"interface_name": line.split(": ")[1]})
             firmwares[-1]["node"] = node_name
@@ -78,48 +120,22 @@ def check_node_firmware(
 
 
 def do_check(args: argparse.Namespace) -> str:
-    if args.skip_oc_debug:
+    if not ocp_utils.utils.can_oc_debug(args):
         return ocp_utils.utils.SKIP()
     if not ocp_utils.utils.supports_sriov():
         return ocp_utils.utils.SKIP()
 
     passed = True
-    physical_interface_firmwares: Dict[str, Dict[str, str]] = {}
-    for sriov_state in ocp_utils.api.SriovNetworkNodeState.get(
-        namespace="openshift-sriov-network-operator",
-    )[
-        "items"
-    ]:  # type: Dict[str, Any]
-        physical_interface_firmwares[sriov_state["metadata"]["name"]] = {}
-        for interface in sriov_state["status"]["interfaces"]:  # type: Dict[str, str]
-            if (
-                firmware_mins.get(
-                    f"{interface['vendor']}:{interface['deviceID']}", "0.0"
-                )
-                != "0.0"
-            ):
-                # We only add physical interfaces to the list if we know the minimum firmware
-                physical_interface_firmwares[sriov_state["metadata"]["name"]][
-                    interface["name"]
-                ] = firmware_mins[f"{interface['vendor']}:{interface['deviceID']}"]
-
     combined_bad_firmwares: List[List[str]] = []
-    with concurrent.futures.ProcessPoolExecutor(
-        max_workers=args.parallel_jobs
-    ) as executor:
-        tasks = []
-        for node in ocp_utils.utils.ready_nodes():  # type: Dict[str, Any]
-            if physical_interface_firmwares.get(node["metadata"]["name"]):
-                # Only run the check on nodes where we have found supported interfaces, and where we know the minimum firmware for those interfaces
-                tasks.append(
-                    executor.submit(
-                        check_node_firmware,
-                        node["metadata"]["name"],
-                        physical_interface_firmwares[node["metadata"]["name"]],
-                    )
-                )
-        for task in concurrent.futures.as_completed(tasks):
-            combined_bad_firmwares.extend(task.result())
+    for node in ocp_utils.utils.ready_nodes():
+        probe = ocp_utils.nodeprobe.result(node.name, "ethernet_firmware")
+        if probe is None:
+            continue
+        combined_bad_firmwares.extend(
+            check_node_firmware(
+                node.name, physical_interface_firmwares()[node.name], probe.output
+            )
+        )
 
     if combined_bad_firmwares:
         passed = False
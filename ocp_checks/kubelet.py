@@ -8,9 +8,9 @@ from typing import Dict, Any, List  # noqa F401
 def do_check(args: argparse.Namespace) -> str:
     passed = True
     degraded_kubeletconfig: List[List[str]] = []
-    for kubeletconfig in ocp_utils.api.KubeletConfig.get()[
-        "items"
-    ]:  # type: Dict[str, Any]
+    for kubeletconfig in ocp_utils.snapshot.iter_items(
+        "KubeletConfig"
+    ):  # type: Dict[str, Any]
         try:
             condition = next(
                 item
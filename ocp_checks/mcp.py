@@ -8,7 +8,9 @@ from typing import Dict, Any, List  # noqa F401
 def do_check(args: argparse.Namespace) -> str:
     passed = True
     degraded_mcp: List[List[str]] = []
-    for mcp in ocp_utils.api.MachineConfigPool.get()["items"]:  # type: Dict[str, Any]
+    for mcp in ocp_utils.snapshot.iter_items(
+        "MachineConfigPool"
+    ):  # type: Dict[str, Any]
         if mcp["status"]["degradedMachineCount"] > 0:
             degraded_mcp.append(
                 [
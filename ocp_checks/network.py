@@ -36,10 +36,14 @@ def do_check(args: argparse.Namespace) -> str:
             "Receive Drops",
         ],
     ]
-    for query in queries:  # type: List[str]
-        for metric in ocp_utils.api.do_prom_query(
+    results = ocp_utils.api.do_prom_queries(
+        [
             f"( rate({query[0]}[{query_range}]) / (rate({query[1]}[{query_range}]) > 0) ) > {args.network_threshold / Decimal(100)}"
-        ):  # type: Dict[str, Any]
+            for query in queries
+        ]
+    )
+    for query, result in zip(queries, results):
+        for metric in result:  # type: Dict[str, Any]
             bad_interfaces.append(
                 [
                     metric["metric"]["instance"],
@@ -2,38 +2,33 @@
 import ocp_utils
 import argparse
 from tabulate import tabulate
-from typing import Dict, Any, List  # noqa F401
+from typing import List
 
 
 def do_check(args: argparse.Namespace) -> str:
     passed = True
     bad_nodes: List[List[str]] = []
-    for node in ocp_utils.utils.nodes:  # type: Dict[str, Any]
-        if (
-            next(
-                item for item in node["status"]["conditions"] if item["type"] == "Ready"
-            )["status"]
-            != "True"
-        ):
+    for node in ocp_utils.utils.nodes:
+        if not node.is_ready():
             bad_nodes.append(
                 [
-                    node["metadata"]["name"],
+                    node.name,
                     f"{ocp_utils.utils.oc_colors['RED']}Not Ready{ocp_utils.utils.oc_colors['ENDC']}",
                 ]
             )
-        if node["spec"].get("unschedulable") is not None:
+        if node.unschedulable is not None:
             bad_nodes.append(
                 [
-                    node["metadata"]["name"],
+                    node.name,
                     f"{ocp_utils.utils.oc_colors['RED']}Unschedulable{ocp_utils.utils.oc_colors['ENDC']}",
                 ]
             )
-        for item in node["status"]["conditions"]:  # type: Dict[str, str]
-            if "Pressure" in item["type"] and item["status"] != "False":
+        for item in node.conditions:
+            if "Pressure" in item.type and item.status != "False":
                 bad_nodes.append(
                     [
-                        node["metadata"]["name"],
-                        f"{ocp_utils.utils.oc_colors['RED']}{item['type']}{ocp_utils.utils.oc_colors['ENDC']}",
+                        node.name,
+                        f"{ocp_utils.utils.oc_colors['RED']}{item.type}{ocp_utils.utils.oc_colors['ENDC']}",
                     ]
                 )
 
@@ -2,35 +2,23 @@
 import ocp_utils
 import argparse
 from tabulate import tabulate
-from typing import Dict, Any, List  # noqa F401
+from typing import List
 
 
 def do_check(args: argparse.Namespace) -> str:
     passed = True
     bad_pods: List[List[str]] = []
-    for pod in ocp_utils.api.Pod.get(
-        field_selector="status.phase!=Running,status.phase!=Succeeded,metadata.namespace!=checks-openshift"
-    )[
-        "items"
-    ]:  # type: Dict[str, Any]
-        try:
-            ready_condition = next(
-                item for item in pod["status"]["conditions"] if item["type"] == "Ready"
-            )
-        except StopIteration:
-            ready_condition = next(
-                item
-                for item in pod["status"]["conditions"]
-                if item["type"] == "PodScheduled"
-            )
-        except TypeError:
-            ready_condition = pod["status"]
+    for pod in ocp_utils.utils.get_pods():
+        if pod.phase in ("Running", "Succeeded") or pod.namespace == "checks-openshift":
+            continue
+        ready_condition = pod.condition("Ready") or pod.condition("PodScheduled")
+        message = ready_condition.message if ready_condition else pod.status_message
         bad_pods.append(
             [
-                pod["metadata"]["name"],
-                pod["metadata"]["namespace"],
-                f"{ocp_utils.utils.oc_colors['RED']}{pod['status']['phase']}{ocp_utils.utils.oc_colors['ENDC']}",
-                ready_condition.get("message", "No message"),
+                pod.name,
+                pod.namespace,
+                f"{ocp_utils.utils.oc_colors['RED']}{pod.phase}{ocp_utils.utils.oc_colors['ENDC']}",
+                message or "No message",
             ]
         )
 
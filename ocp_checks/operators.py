@@ -8,9 +8,9 @@ from typing import Dict, Any, List  # noqa F401
 def do_check(args: argparse.Namespace) -> str:
     passed = True
     bad_operators: List[List[str]] = []
-    for cluster_operator in ocp_utils.api.ClusterOperator.get()[
-        "items"
-    ]:  # type: Dict[str, Any]
+    for cluster_operator in ocp_utils.snapshot.iter_items(
+        "ClusterOperator"
+    ):  # type: Dict[str, Any]
         for condition in cluster_operator["status"][
             "conditions"
         ]:  # type: Dict[str, str]
@@ -33,11 +33,9 @@ def do_check(args: argparse.Namespace) -> str:
                     ]
                 )
 
-    for operator in ocp_utils.api.ClusterServiceVersion.get(
-        label_selector="!olm.copiedFrom"
-    )[
-        "items"
-    ]:  # type: Dict[str, Any]
+    for operator in ocp_utils.snapshot.iter_items(
+        "ClusterServiceVersion", label_selector="!olm.copiedFrom"
+    ):  # type: Dict[str, Any]
         if operator["status"]["phase"] != "Succeeded":
             bad_operators.append(
                 [
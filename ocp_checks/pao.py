@@ -1,6 +1,7 @@
 # This check look for PerformanceProfiles that don't look good
 import ocp_utils
 import argparse
+from kubernetes import dynamic
 from tabulate import tabulate
 from typing import Dict, Any, List  # noqa F401
 
@@ -11,9 +12,11 @@ def do_check(args: argparse.Namespace) -> str:
 
     passed = True
     degraded_perfprofile: List[List[str]] = []
-    for perfprofile in ocp_utils.api.PerformanceProfile.get()[
-        "items"
-    ]:  # type: Dict[str, Any]
+    try:
+        perfprofiles = ocp_utils.api.PerformanceProfile.get()
+    except dynamic.exceptions.ResourceNotFoundError:
+        return ocp_utils.utils.SKIP()
+    for perfprofile in perfprofiles["items"]:  # type: Dict[str, Any]
         degraded_condition = next(
             item
             for item in perfprofile["status"]["conditions"]
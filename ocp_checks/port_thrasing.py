@@ -3,7 +3,16 @@ import ocp_utils
 import ocp_utils.api
 import argparse
 from tabulate import tabulate
-from typing import Dict, Any, List  # noqa F401
+from typing import List
+
+ocp_utils.logscan.register(
+    "port_thrasing",
+    "Changing chassis for lport",
+    namespace="openshift-ovn-kubernetes",
+    container="ovn-controller",
+    check="port_thrasing",
+    literal=True,
+)
 
 
 def do_check(args: argparse.Namespace) -> str:
@@ -12,22 +21,23 @@ def do_check(args: argparse.Namespace) -> str:
 
     passed = True
     thrasing_pods: List[List[str]] = []
-    for pod in ocp_utils.api.Pod.get(
-        namespace="openshift-ovn-kubernetes", label_selector="app=ovnkube-node"
-    )[
-        "items"
-    ]:  # type: Dict[str, Any]
-        thrasing_messages = ocp_utils.api.ReadPodLogs(
+    for pod in ocp_utils.utils.get_pods():
+        if (
+            pod.namespace != "openshift-ovn-kubernetes"
+            or pod.labels.get("app") != "ovnkube-node"
+        ):
+            continue
+        thrasing_messages = ocp_utils.logscan.scan_pod_log(
             namespace="openshift-ovn-kubernetes",
-            name=pod["metadata"]["name"],
+            name=pod.name,
             container="ovn-controller",
-        ).count("Changing chassis for lport")
+        )["port_thrasing"].count
 
         if thrasing_messages > args.port_thrasing_threshold:
             thrasing_pods.append(
                 [
-                    pod["metadata"]["name"],
-                    pod["spec"]["nodeName"],
+                    pod.name,
+                    pod.node_name,
                     f"{ocp_utils.utils.oc_colors['RED']}{thrasing_messages}{ocp_utils.utils.oc_colors['ENDC']}",
                 ]
             )
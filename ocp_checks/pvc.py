@@ -8,9 +8,9 @@ from typing import Dict, Any, List  # noqa F401
 def do_check(args: argparse.Namespace) -> str:
     passed = True
     bad_pvcs: List[List[str]] = []
-    for pvc in ocp_utils.api.PersistentVolumeClaim.get()[
-        "items"
-    ]:  # type: Dict[str, Any]
+    for pvc in ocp_utils.snapshot.iter_items(
+        "PersistentVolumeClaim"
+    ):  # type: Dict[str, Any]
         if pvc["metadata"].get("deletionTimestamp"):
             status = "Terminating"
         else:
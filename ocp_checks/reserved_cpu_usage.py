@@ -16,26 +16,30 @@ def do_check(args: argparse.Namespace) -> str:
 
     passed = True
     bad_nodes: List[List[str]] = []
-    for node in ocp_utils.utils.nodes:  # type: Dict[str, Any]
+    reserved_cpus: Dict[str, Decimal] = {}
+    for node in ocp_utils.utils.nodes:
         reserved_cpu_count = utils.parse_quantity(
-            node["status"]["capacity"]["cpu"]
-        ) - utils.parse_quantity(node["status"]["allocatable"]["cpu"])
-        if reserved_cpu_count < Decimal(1):
-            # Node does not have any reserved CPUs
-            continue
+            node.cpu_capacity
+        ) - utils.parse_quantity(node.cpu_allocatable)
+        # Nodes without any reserved CPUs are left out
+        if reserved_cpu_count >= Decimal(1):
+            reserved_cpus[node.name] = reserved_cpu_count
+    if not reserved_cpus:
+        return ocp_utils.utils.PASS()
+
+    # There can be several series for the slice on a node, they are added up so that each node has one value
+    node_cpu_usage = ocp_utils.api.do_prom_query_map(
+        f'sum by (node) (rate(container_cpu_usage_seconds_total{{id="/system.slice"}}[{query_range}]))',
+        "node",
+    )
+    for node_name, reserved_cpu_count in reserved_cpus.items():
         used_percent = (
-            Decimal(
-                ocp_utils.api.do_prom_query(
-                    f'rate(container_cpu_usage_seconds_total{{node="{node["metadata"]["name"]}",id="/system.slice"}}[{query_range}])'
-                )[0]["value"][1]
-            )
-            / reserved_cpu_count
-            * Decimal(100)
+            Decimal(node_cpu_usage[node_name]) / reserved_cpu_count * Decimal(100)
         )
         if used_percent > Decimal(args.reserved_cpu_threshold):
             bad_nodes.append(
                 [
-                    node["metadata"]["name"],
+                    node_name,
                     f"{ocp_utils.utils.oc_colors['RED']}{used_percent}{ocp_utils.utils.oc_colors['ENDC']}",
                 ]
             )
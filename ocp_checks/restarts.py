@@ -4,33 +4,29 @@ import argparse
 import dateutil.parser
 from tabulate import tabulate
 from datetime import timedelta
-from typing import Dict, Any, List  # noqa F401
+from typing import List
 
 
 def do_check(args: argparse.Namespace) -> str:
     passed = True
     bad_containers: List[List[str]] = []
     current_time = ocp_utils.api.GetCurrentTime()
-    for pod in ocp_utils.utils.pods:  # type: Dict[str, Any]
-        for container in pod["status"].get(
-            "containerStatuses", []
-        ):  # type: Dict[str, Any]
-            if container["lastState"].get("terminated"):
-                try:
-                    event_age = current_time - dateutil.parser.parse(
-                        container["lastState"]["terminated"]["finishedAt"]
-                    )
-                except TypeError:
-                    continue
-                if container["lastState"]["terminated"][
-                    "reason"
-                ] != "Completed" and event_age < timedelta(hours=24):
+    for pod in ocp_utils.utils.get_pods():
+        for container in pod.containers:
+            if container.terminated_finished_at:
+                event_age = current_time - dateutil.parser.parse(
+                    container.terminated_finished_at
+                )
+                if (
+                    container.terminated_reason != "Completed"
+                    and event_age < timedelta(hours=24)
+                ):
                     bad_containers.append(
                         [
-                            pod["metadata"]["name"],
-                            pod["metadata"]["namespace"],
-                            container["name"],
-                            f"{ocp_utils.utils.oc_colors['RED']}{container['lastState']['terminated']['reason']}{ocp_utils.utils.oc_colors['ENDC']}",
+                            pod.name,
+                            pod.namespace,
+                            container.name,
+                            f"{ocp_utils.utils.oc_colors['RED']}{container.terminated_reason}{ocp_utils.utils.oc_colors['ENDC']}",
                         ]
                     )
 
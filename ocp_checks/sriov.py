@@ -1,6 +1,7 @@
 # This check makes sure that the SR-IOV node state on each node is good
 import ocp_utils
 import argparse
+from kubernetes import dynamic
 from tabulate import tabulate
 from typing import Dict, Any, List  # noqa F401
 
@@ -11,11 +12,13 @@ def do_check(args: argparse.Namespace) -> str:
 
     passed = True
     bad_sriov: List[List[str]] = []
-    for sriov_state in ocp_utils.api.SriovNetworkNodeState.get(
-        namespace="openshift-sriov-network-operator"
-    )[
-        "items"
-    ]:  # type: Dict[str, Any]
+    try:
+        sriov_states = ocp_utils.api.SriovNetworkNodeState.get(
+            namespace="openshift-sriov-network-operator"
+        )
+    except dynamic.exceptions.ResourceNotFoundError:
+        return ocp_utils.utils.SKIP()
+    for sriov_state in sriov_states["items"]:  # type: Dict[str, Any]
         if sriov_state["status"]["syncStatus"] != "Succeeded":
             bad_sriov.append(
                 [
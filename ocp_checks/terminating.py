@@ -5,17 +5,23 @@ from tabulate import tabulate
 from typing import List
 
 
+def find_terminating_pods() -> List[List[str]]:
+    # Other checks usually listed every pod already, otherwise only their metadata is listed
+    pods = ocp_utils.snapshot.cached("Pod")
+    if pods is not None:
+        return [[pod.name, pod.namespace] for pod in pods if pod.deletion_timestamp]
+    return [
+        [pod["name"], pod["namespace"]]
+        for pod in ocp_utils.api.list_metadata(
+            ocp_utils.api.Pod, ocp_utils.snapshot.page_size
+        )
+        if pod.get("deletionTimestamp")
+    ]
+
+
 def do_check(args: argparse.Namespace) -> str:
     passed = True
-    terminating_pods: List[List[str]] = []
-    for pod in ocp_utils.utils.pods:
-        if pod["metadata"].get("deletionTimestamp"):
-            terminating_pods.append(
-                [
-                    pod["metadata"]["name"],
-                    pod["metadata"]["namespace"],
-                ]
-            )
+    terminating_pods = find_terminating_pods()
 
     if terminating_pods:
         passed = False
@@ -26,7 +26,7 @@ def check_cv(updates: List[List[str]]) -> None:
 
 
 def check_operators(updates: List[List[str]]) -> None:
-    for sub in ocp_utils.api.Subscription.get()["items"]:  # type: Dict[str, Any]
+    for sub in ocp_utils.snapshot.iter_items("Subscription"):  # type: Dict[str, Any]
         message = ""
         for condition in sub["status"]["conditions"]:  # type: Dict[str, str]
             if (
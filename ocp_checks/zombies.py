@@ -2,56 +2,39 @@
 # This can sometimes indicate an issue with exec probes
 import ocp_utils
 import argparse
-import concurrent.futures
-import subprocess  # nosec
-from typing import Tuple, Dict, Any, List  # noqa F401
+from typing import Dict, Any, List, Optional  # noqa F401
 from tabulate import tabulate
 
+ocp_utils.nodeprobe.register(
+    "zombies", lambda node_name: "ps -ef | grep -c '[d]efunct'", check="zombies"
+)
 
-def check_node_zombies(node_name: str) -> Tuple[str, int]:
-    output = subprocess.run(  # nosec
-        [
-            "oc",
-            "debug",
-            f"node/{node_name}",
-            "--",
-            "chroot",
-            "/host",
-            "sh",
-            "-c",
-            "ps -ef | grep -c '[d]efunct'",
-        ],
-        capture_output=True,
-    )
+
+# Returns -1 if the probe didn't run on the node
+def parse_zombies(probe: Optional[ocp_utils.nodeprobe.ProbeResult]) -> int:
+    if probe is None:
+        return -1
     try:
-        zombies = int(output.stdout.decode())
+        return int(probe.output)
     except ValueError:
-        return node_name, -1
-
-    return node_name, zombies
+        return -1
 
 
 def do_check(args: argparse.Namespace) -> str:
-    if args.skip_oc_debug:
+    if not ocp_utils.utils.can_oc_debug(args):
         return ocp_utils.utils.SKIP()
 
     passed = True
     node_with_zombies: List[List[str]] = []
-    with concurrent.futures.ProcessPoolExecutor(
-        max_workers=args.parallel_jobs
-    ) as executor:
-        tasks = []
-        for node in ocp_utils.utils.ready_nodes():  # type: Dict[str, Any]
-            tasks.append(executor.submit(check_node_zombies, node["metadata"]["name"]))
-        for task in concurrent.futures.as_completed(tasks):
-            node_name, zombies = task.result()
-            if zombies > args.zombie_threshold or zombies == -1:
-                node_with_zombies.append(
-                    [
-                        node_name,
-                        f"{ocp_utils.utils.oc_colors['RED']}{zombies if zombies > -1 else 'ERROR'}{ocp_utils.utils.oc_colors['ENDC']}",
-                    ]
-                )
+    for node in ocp_utils.utils.ready_nodes():
+        zombies = parse_zombies(ocp_utils.nodeprobe.result(node.name, "zombies"))
+        if zombies > args.zombie_threshold or zombies == -1:
+            node_with_zombies.append(
+                [
+                    node.name,
+                    f"{ocp_utils.utils.oc_colors['RED']}{zombies if zombies > -1 else 'ERROR'}{ocp_utils.utils.oc_colors['ENDC']}",
+                ]
+            )
 
     if node_with_zombies:
         passed = False
@@ -1,4 +1,18 @@
 # flake8: noqa
+from . import deadlines
+from . import timings
 from . import utils
+from . import prometheus
 from . import api
+from . import fanout
+from . import logscan
+from . import mgarchive
+from . import mgcache
 from . import mustgather
+from . import netprobe
+from . import nodeprobe
+from . import profiling
+from . import records
+from . import runner
+from . import selectors
+from . import snapshot
@@ -1,59 +1,132 @@
 from kubernetes import dynamic, client  # type:ignore
-from typing import Any, List, Dict
+from typing import Any, Iterator, List, Dict, Optional, Sequence
 from datetime import datetime, timezone
 import requests
 import argparse
+import hashlib
+import os
+import tempfile
+import threading
 import ocp_utils
 import subprocess  # nosec
 from urllib3.exceptions import InsecureRequestWarning
 
 from ocp_utils.mustgather import MustGather
+from ocp_utils.prometheus import PrometheusClient
 
 requests.packages.urllib3.disable_warnings(InsecureRequestWarning)  # type: ignore
-_prom_session = requests.Session()
-_prom_data = {"route": "", "bearer": ""}
-
-CertificateSigningRequest: dynamic.Resource = None
-ClusterOperator: dynamic.Resource = None
-ClusterServiceVersion: dynamic.Resource = None
-ClusterVersion: dynamic.Resource = None
-CustomResourceDefinition: dynamic.Resource = None
-DNS: dynamic.Resource = None
-Event: dynamic.Resource = None
-MachineConfigPool: dynamic.Resource = None
-Namespace: dynamic.Resource = None
-Network: dynamic.Resource = None
-Node: dynamic.Resource = None
-PersistentVolumeClaim: dynamic.Resource = None
-Pod: dynamic.Resource = None
-PodNetworkConnectivityCheck: dynamic.Resource = None
-Route: dynamic.Resource = None
-Secret: dynamic.Resource = None
-ServiceAccount: dynamic.Resource = None
-SriovNetworkNodeState: dynamic.Resource = None
-Subscription: dynamic.Resource = None
-KubeletConfig: dynamic.Resource = None
-PerformanceProfile: dynamic.Resource = None
-
-ReadPodLogs: dynamic.Resource = None
-GetAlerts: dynamic.Resource = None
-GetCurrentTime: dynamic.Resource = None
+_prom_client: Optional[PrometheusClient] = None
+_prom_args: Optional[argparse.Namespace] = None
+_prom_bearer_token: Optional[str] = None
+_prom_lock = threading.Lock()
+_api_client: Optional[client.ApiClient] = None
+_discovery_cache_file: Optional[str] = None
+_discovery_cache_dir: Optional[tempfile.TemporaryDirectory[str]] = None
+_dynamic_client: Optional[dynamic.DynamicClient] = None
+_dynamic_client_lock = threading.Lock()
+
+# A LazyResource when the checks run against a cluster, and a MustGather when they run against a must-gather
+CertificateSigningRequest: Any = None
+ClusterOperator: Any = None
+ClusterServiceVersion: Any = None
+ClusterVersion: Any = None
+CustomResourceDefinition: Any = None
+DNS: Any = None
+Event: Any = None
+MachineConfigPool: Any = None
+Namespace: Any = None
+Network: Any = None
+Node: Any = None
+PersistentVolumeClaim: Any = None
+Pod: Any = None
+PodNetworkConnectivityCheck: Any = None
+Route: Any = None
+Secret: Any = None
+ServiceAccount: Any = None
+SriovNetworkNodeState: Any = None
+Subscription: Any = None
+KubeletConfig: Any = None
+PerformanceProfile: Any = None
+
+# Functions that read from the cluster or from the must-gather
+StreamPodLogs: Any = None
+GetAlerts: Any = None
+GetCurrentTime: Any = None
+
+
+# Resolves the resource the first time it is used, so that a run only looks up the kinds its checks need
+class LazyResource:
+    def __init__(self, api_version: str, kind: str) -> None:
+        self._api_version = api_version
+        self._kind = kind
+        self._resource: Optional[dynamic.Resource] = None
+        self._lock = threading.Lock()
+
+    def resolve(self) -> dynamic.Resource:
+        with self._lock:
+            if self._resource is None:
+                self._resource = get_dynamic_client().resources.get(
+                    api_version=self._api_version, kind=self._kind
+                )
+            return self._resource
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.resolve(), name)
+
+
+# The DynamicClient asks the API server for its version as soon as it is created, so it is only created when a resource is first used
+def get_dynamic_client() -> dynamic.DynamicClient:
+    global _dynamic_client
+    with _dynamic_client_lock:
+        if _dynamic_client is None:
+            _dynamic_client = dynamic.DynamicClient(
+                _api_client, cache_file=_discovery_cache_file
+            )
+        return _dynamic_client
+
+
+# API discovery data is kept in the cache directory between runs, with one file per cluster
+# Without a file, the kubernetes library would keep it in the shared temp dir under a name anyone can predict, and
+# reuse it on every run, so with --no-cache (or when the cache directory can't be used) the file is in a temp dir of
+# this run, which is deleted when the run ends
+def _get_discovery_cache_file(args: argparse.Namespace, host: str) -> str:
+    global _discovery_cache_dir
+    if not args.no_cache:
+        name = hashlib.sha256(host.encode()).hexdigest()
+        try:
+            ocp_utils.mgcache.prepare_cache_dir(args.cache_dir)
+            return os.path.join(args.cache_dir, f"discovery-{name}.json")
+        except OSError:
+            pass
+    if _discovery_cache_dir is None:
+        _discovery_cache_dir = tempfile.TemporaryDirectory(prefix="openshift-checks-")
+    return os.path.join(_discovery_cache_dir.name, "discovery.json")
 
 
 def get_time() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def read_namespaced_pod_log(namespace: str, name: str, container: str) -> Any:
-    return client.CoreV1Api().read_namespaced_pod_log(
+# Yields the log as it arrives, instead of holding all of it in memory
+def stream_namespaced_pod_log(
+    namespace: str, name: str, container: str
+) -> Iterator[bytes]:
+    response: Any = client.CoreV1Api(_api_client).read_namespaced_pod_log(
         namespace=namespace,
         name=name,
         container=container,
+        _preload_content=False,
     )
+    try:
+        yield from response.stream(ocp_utils.logscan.chunk_size)
+    finally:
+        response.release_conn()
 
 
 def _get_prom_token() -> str:
-    sa_token_request = client.CoreV1Api().create_namespaced_service_account_token(
+    sa_token_request = client.CoreV1Api(
+        _api_client
+    ).create_namespaced_service_account_token(
         namespace="openshift-monitoring", name="prometheus-k8s", body={}
     )
     return f"Bearer {sa_token_request.status.token}"
@@ -68,39 +141,84 @@ def _get_prom_route() -> str:
     )
 
 
-def _prom_init(bearer_token: str) -> None:
-    _prom_data["route"] = _get_prom_route()
-    _prom_data["bearer"] = bearer_token if bearer_token else _get_prom_token()
+# The Prometheus route and token are only looked up when the first query is sent
+# The route isn't looked up at all when --prometheus-url is given
+def _prom_init(args: argparse.Namespace, bearer_token: str) -> None:
+    global _prom_args, _prom_bearer_token
+    _prom_args = args
+    _prom_bearer_token = bearer_token
+
+
+def _get_prom_client() -> PrometheusClient:
+    global _prom_client
+    with _prom_lock:
+        if _prom_client is None:
+            if _prom_args is None:
+                raise RuntimeError("Prometheus client is not initialized")
+            _prom_client = PrometheusClient(
+                _prom_args.prometheus_url or f"https://{_get_prom_route()}",
+                _prom_bearer_token if _prom_bearer_token else _get_prom_token(),
+                timeout=_prom_args.request_timeout,
+            )
+        return _prom_client
+
+
+metadata_accept = (
+    "application/json;as=PartialObjectMetadataList;g=meta.k8s.io;v=v1,application/json"
+)
+
+
+# Lists a resource page_size items at a time, following the continue token of each page
+# A page_size of 0 lists everything in one request
+def _list_pages(resource: Any, page_size: int, **kwargs: Any) -> Iterator[Any]:
+    _continue = None
+    while True:
+        page = resource.get(limit=page_size or None, _continue=_continue, **kwargs)
+        yield page
+        _continue = (page.get("metadata") or {}).get("continue")
+        if not _continue:
+            return
+
+
+# Items are yielded as each page arrives, so the whole list never has to be held in a single response
+def list_paginated(resource: Any, page_size: int, **kwargs: Any) -> Iterator[Any]:
+    for page in _list_pages(resource, page_size, **kwargs):
+        yield from page["items"]
+
+
+# Yields only the metadata of each object, for checks that don't need the spec or the status
+# The API server sends a PartialObjectMetadataList, which is much smaller than the full objects
+def list_metadata(resource: Any, page_size: int, **kwargs: Any) -> Iterator[Any]:
+    for item in list_paginated(
+        resource, page_size, header_params={"Accept": metadata_accept}, **kwargs
+    ):
+        yield item["metadata"]
 
 
 # Helper function to query Prometheus for metrics
 def do_prom_query(query: str) -> List[Dict[str, Any]]:
-    headers = {"Authorization": _prom_data["bearer"]}
-    resp = _prom_session.post(
-        f"https://{_prom_data['route']}/api/v1/query",
-        headers=headers,
-        verify=False,  # nosec
-        params={"query": query},
-    )
-    resp.raise_for_status()
-    return list(resp.json()["data"]["result"])
+    return _get_prom_client().query(query)
+
+
+# Helper function to send several queries to Prometheus at the same time
+def do_prom_queries(queries: Sequence[str]) -> List[List[Dict[str, Any]]]:
+    return _get_prom_client().query_many(queries)
+
+
+# Helper function for queries that return one series per node (or per any other label)
+# A single vector query replaces one query per node, the result maps each label value to its sample value
+# The query has to aggregate by label (for example "sum by (node) (...)"), so that each value has a single series
+def do_prom_query_map(query: str, label: str) -> Dict[str, str]:
+    values: Dict[str, str] = {}
+    for metric in do_prom_query(query):  # type: Dict[str, Any]
+        values[metric["metric"].get(label, "")] = metric["value"][1]
+    return values
 
 
 # Alerts are gathered from Prometheus rather than Alertmanager, since users may disable Alertmanager
 def get_alerts() -> Any:
-    route = Route.get(
-        name="prometheus-k8s",
-        namespace="openshift-monitoring",
-    )
-    headers = {"Authorization": _prom_data["bearer"]}
-    resp = _prom_session.get(
-        f"https://{route['spec']['host']}/api/v1/rules",
-        headers=headers,
-        verify=False,  # nosec
-    )
-    resp.raise_for_status()
     firing_alerts = []
-    for group in resp.json()["data"]["groups"]:
+    for group in _get_prom_client().rules():
         for rule in group["rules"]:
             if rule.get("type") == "alerting" and rule.get("state") == "firing":
                 firing_alerts.extend(rule["alerts"])
@@ -125,7 +243,9 @@ def init_must_gather(args: argparse.Namespace) -> None:
     ocp_utils.api.CustomResourceDefinition = MustGather(
         api_version="apiextensions.k8s.io/v1", kind="CustomResourceDefinition"
     )
-    ocp_utils.api.DNS = MustGather(api_version="config.openshift.io/v1", kind="DNS")
+    ocp_utils.api.DNS = MustGather(
+        api_version="config.openshift.io/v1", kind="DNS", plural="dnses"
+    )
     ocp_utils.api.Event = MustGather(api_version="v1", kind="Event")
     ocp_utils.api.KubeletConfig = MustGather(
         api_version="machineconfiguration.openshift.io/v1", kind="KubeletConfig"
@@ -160,104 +280,120 @@ def init_must_gather(args: argparse.Namespace) -> None:
         api_version="sriovnetwork.openshift.io/v1", kind="SriovNetworkNodeState"
     )
 
-    ocp_utils.api.ReadPodLogs = ocp_utils.mustgather.read_namespaced_pod_log
+    ocp_utils.api.StreamPodLogs = ocp_utils.mustgather.stream_namespaced_pod_log
     ocp_utils.api.GetAlerts = ocp_utils.mustgather.get_alerts
     ocp_utils.api.GetCurrentTime = ocp_utils.mustgather.get_time
 
 
-def has_oc_debug_access() -> bool:
-    oc_debug_access = subprocess.run(  # nosec
-        [
-            "oc",
-            "auth",
-            "can-i",
-            "create",
-            "pods",
-            "-n",
-            "default",
-        ],
-        capture_output=True,
-    )
+def has_oc_debug_access(timeout: Optional[float] = None) -> bool:
+    try:
+        oc_debug_access = subprocess.run(  # nosec
+            [
+                "oc",
+                "auth",
+                "can-i",
+                "create",
+                "pods",
+                "-n",
+                "default",
+            ],
+            capture_output=True,
+            timeout=ocp_utils.deadlines.timeout(timeout or None),
+        )
+    except subprocess.TimeoutExpired:
+        return False
     if oc_debug_access.returncode != 0:
         return False
     else:
         return True
 
 
+# Requests to the API server time out after --request-timeout seconds, or earlier if the deadline is closer
+# Requests that set their own timeout keep it
+def _set_request_timeout(api_client: Any, timeout: float) -> None:
+    call_api = api_client.call_api
+
+    def call_api_with_timeout(*args: Any, **kwargs: Any) -> Any:
+        if kwargs.get("_request_timeout") is None:
+            kwargs["_request_timeout"] = ocp_utils.deadlines.timeout(
+                timeout if timeout > 0 else None
+            )
+        return call_api(*args, **kwargs)
+
+    api_client.call_api = call_api_with_timeout
+
+
 def init_api(args: argparse.Namespace, k8s_config: client.Configuration) -> None:
-    dynamic_client = dynamic.DynamicClient(
-        client.api_client.ApiClient(configuration=k8s_config)
-    )
-    ocp_utils.api.CertificateSigningRequest = dynamic_client.resources.get(
-        api_version="certificates.k8s.io/v1", kind="CertificateSigningRequest"
-    )
-    ocp_utils.api.ClusterOperator = dynamic_client.resources.get(
+    global _api_client, _discovery_cache_file
+    _api_client = client.api_client.ApiClient(configuration=k8s_config)
+    _set_request_timeout(_api_client, args.request_timeout)
+    ocp_utils.timings.instrument_api_client(_api_client)
+    _discovery_cache_file = _get_discovery_cache_file(
+        args, str(_api_client.configuration.host)
+    )
+    ocp_utils.api.CertificateSigningRequest = LazyResource(
+        api_version="certificates.k8s.io/v1",
+        kind="CertificateSigningRequest",
+    )
+    ocp_utils.api.ClusterOperator = LazyResource(
         api_version="config.openshift.io/v1", kind="ClusterOperator"
     )
-    ocp_utils.api.ClusterServiceVersion = dynamic_client.resources.get(
-        api_version="operators.coreos.com/v1alpha1", kind="ClusterServiceVersion"
+    ocp_utils.api.ClusterServiceVersion = LazyResource(
+        api_version="operators.coreos.com/v1alpha1",
+        kind="ClusterServiceVersion",
     )
-    ocp_utils.api.ClusterVersion = dynamic_client.resources.get(
+    ocp_utils.api.ClusterVersion = LazyResource(
         api_version="config.openshift.io/v1", kind="ClusterVersion"
     )
-    ocp_utils.api.CustomResourceDefinition = dynamic_client.resources.get(
-        api_version="apiextensions.k8s.io/v1", kind="CustomResourceDefinition"
+    ocp_utils.api.CustomResourceDefinition = LazyResource(
+        api_version="apiextensions.k8s.io/v1",
+        kind="CustomResourceDefinition",
     )
-    ocp_utils.api.DNS = dynamic_client.resources.get(
-        api_version="config.openshift.io/v1", kind="DNS"
+    ocp_utils.api.DNS = LazyResource(api_version="config.openshift.io/v1", kind="DNS")
+    ocp_utils.api.Event = LazyResource(api_version="v1", kind="Event")
+    ocp_utils.api.KubeletConfig = LazyResource(
+        api_version="machineconfiguration.openshift.io/v1",
+        kind="KubeletConfig",
     )
-    ocp_utils.api.Event = dynamic_client.resources.get(api_version="v1", kind="Event")
-    ocp_utils.api.KubeletConfig = dynamic_client.resources.get(
-        api_version="machineconfiguration.openshift.io/v1", kind="KubeletConfig"
-    )
-    ocp_utils.api.MachineConfigPool = dynamic_client.resources.get(
-        api_version="machineconfiguration.openshift.io/v1", kind="MachineConfigPool"
-    )
-    ocp_utils.api.Namespace = dynamic_client.resources.get(
-        api_version="v1", kind="Namespace"
+    ocp_utils.api.MachineConfigPool = LazyResource(
+        api_version="machineconfiguration.openshift.io/v1",
+        kind="MachineConfigPool",
     )
-    ocp_utils.api.Network = dynamic_client.resources.get(
+    ocp_utils.api.Namespace = LazyResource(api_version="v1", kind="Namespace")
+    ocp_utils.api.Network = LazyResource(
         api_version="config.openshift.io/v1", kind="Network"
     )
-    ocp_utils.api.Node = dynamic_client.resources.get(api_version="v1", kind="Node")
-    ocp_utils.api.PersistentVolumeClaim = dynamic_client.resources.get(
+    ocp_utils.api.Node = LazyResource(api_version="v1", kind="Node")
+    ocp_utils.api.PersistentVolumeClaim = LazyResource(
         api_version="v1", kind="PersistentVolumeClaim"
     )
-    ocp_utils.api.Pod = dynamic_client.resources.get(api_version="v1", kind="Pod")
-    ocp_utils.api.PodNetworkConnectivityCheck = dynamic_client.resources.get(
+    ocp_utils.api.Pod = LazyResource(api_version="v1", kind="Pod")
+    ocp_utils.api.PodNetworkConnectivityCheck = LazyResource(
         api_version="controlplane.operator.openshift.io/v1alpha1",
         kind="PodNetworkConnectivityCheck",
     )
-    ocp_utils.api.Route = dynamic_client.resources.get(
+    ocp_utils.api.Route = LazyResource(
         api_version="route.openshift.io/v1", kind="Route"
     )
-    ocp_utils.api.Secret = dynamic_client.resources.get(api_version="v1", kind="Secret")
-    ocp_utils.api.ServiceAccount = dynamic_client.resources.get(
-        api_version="v1", kind="ServiceAccount"
-    )
-    ocp_utils.api.Subscription = dynamic_client.resources.get(
+    ocp_utils.api.Secret = LazyResource(api_version="v1", kind="Secret")
+    ocp_utils.api.ServiceAccount = LazyResource(api_version="v1", kind="ServiceAccount")
+    ocp_utils.api.Subscription = LazyResource(
         api_version="operators.coreos.com/v1alpha1", kind="Subscription"
     )
-    # Not every cluster supports the following resource types
-    try:
-        ocp_utils.api.PerformanceProfile = dynamic_client.resources.get(
-            api_version="performance.openshift.io/v2", kind="PerformanceProfile"
-        )
-        ocp_utils.api.SriovNetworkNodeState = dynamic_client.resources.get(
-            api_version="sriovnetwork.openshift.io/v1", kind="SriovNetworkNodeState"
-        )
-    except dynamic.exceptions.ResourceNotFoundError:
-        pass
-    ocp_utils.api.ReadPodLogs = read_namespaced_pod_log
+    # Not every cluster supports the following resource types, they raise dynamic.exceptions.ResourceNotFoundError
+    # when they are first used on a cluster that doesn't
+    ocp_utils.api.PerformanceProfile = LazyResource(
+        api_version="performance.openshift.io/v2", kind="PerformanceProfile"
+    )
+    ocp_utils.api.SriovNetworkNodeState = LazyResource(
+        api_version="sriovnetwork.openshift.io/v1", kind="SriovNetworkNodeState"
+    )
+    ocp_utils.api.StreamPodLogs = stream_namespaced_pod_log
     ocp_utils.api.GetAlerts = get_alerts
     ocp_utils.api.GetCurrentTime = get_time
     bearer_token = (
-        dynamic_client.configuration.auth_settings()
+        _api_client.configuration.auth_settings()
         .get("BearerToken", {})
         .get("value", "")
     )
-    _prom_init(bearer_token)
-
-    if args.skip_oc_debug is False:
-        if has_oc_debug_access() is False:
-            args.skip_oc_debug = True
+    _prom_init(args, bearer_token)
@@ -0,0 +1,83 @@
+# Deadlines for the whole run (--timeout) and for each check (--check-timeout)
+# Remote calls (requests to the API server and Prometheus, oc commands, connections) get their timeout from
+# timeout(), which never goes past the deadline of the check they run for or of the run, so work that ran out
+# of time stops by itself instead of being left behind
+# The deadline of a check is kept in a context variable, threads started with ocp_utils.timings.in_context inherit it
+from typing import Iterator, Optional
+import contextlib
+import contextvars
+import time
+
+
+# Not a TimeoutError, so that it isn't caught by the "except OSError" of a check
+class DeadlineExceeded(Exception):
+    pass
+
+
+# time.monotonic() by which the run has to end, None for no limit
+run_deadline: Optional[float] = None
+# --check-timeout, also bounds work done for a check outside of its own deadline, 0 for no limit
+check_timeout: float = 0
+_deadline: "contextvars.ContextVar[Optional[float]]" = contextvars.ContextVar(
+    "deadline", default=None
+)
+
+
+# The run budget starts counting when this is called
+def configure(run_timeout: float, timeout_per_check: float) -> None:
+    global run_deadline, check_timeout
+    run_deadline = time.monotonic() + run_timeout if run_timeout > 0 else None
+    check_timeout = timeout_per_check
+
+
+def deadline() -> Optional[float]:
+    deadlines = [end for end in (run_deadline, _deadline.get()) if end is not None]
+    return min(deadlines) if deadlines else None
+
+
+# Seconds left before the deadline, None for no limit
+def remaining() -> Optional[float]:
+    end = deadline()
+    return None if end is None else end - time.monotonic()
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+# Work done in this context has to end within seconds from now, 0 for no limit
+# A deadline that was already set in the context is never moved later
+@contextlib.contextmanager
+def limit(seconds: float) -> Iterator[None]:
+    current = _deadline.get()
+    end = time.monotonic() + seconds if seconds > 0 else None
+    if end is not None and current is not None:
+        end = min(end, current)
+    token = _deadline.set(end if end is not None else current)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+# Work shared by several checks, like the oc debug sessions, is only bound by the run deadline, rather than by the
+# deadline of whichever check happened to start it
+@contextlib.contextmanager
+def shared() -> Iterator[None]:
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+# Timeout of a remote call that may take up to default seconds (None for no limit) when there is no deadline
+# No new call is started once the deadline has passed
+def timeout(default: Optional[float]) -> Optional[float]:
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded("Ran out of time")
+    return left if default is None else min(default, left)
@@ -0,0 +1,182 @@
+# Runs a function on many nodes at the same time, in threads
+# The work is mostly waiting on oc subprocesses, so threads are enough, and unlike processes they don't have to
+# import everything again (which is slow in the PyInstaller binary) or pickle their arguments
+# All fan-outs share one limit, so checks running at the same time don't start more than --parallel-jobs jobs together
+# With --adaptive-jobs the limit starts low and follows how the cluster copes (additive increase, multiplicative decrease)
+from typing import Callable, Generic, Iterable, Iterator, List, Optional, Set, TypeVar
+import concurrent.futures
+import subprocess  # nosec
+import threading
+import time
+import ocp_utils
+
+T = TypeVar("T")
+
+# With an adaptive limit, a job that takes slow_factor times longer than the fastest job so far counts as a failure
+slow_factor = 3.0
+# Jobs that run at first when the limit is adaptive
+initial_adaptive_jobs = 2
+# Seconds a job on a single node may take, None for no limit
+node_timeout: Optional[float] = None
+# Seconds a command that timed out has to exit by itself, before it is killed
+terminate_grace = 10
+# Seconds to read what a command that timed out printed before it stopped, its children may keep the pipes open
+drain_timeout = 1.0
+# Commands that are running, so that the ones left behind by checks that timed out can be stopped when the run ends
+_processes: "Set[subprocess.Popen[bytes]]" = set()
+_processes_lock = threading.Lock()
+# Set by terminate_all, no new command starts after that
+_stopping = False
+
+
+class NodeResult(Generic[T]):
+    def __init__(
+        self,
+        node_name: str,
+        value: Optional[T],
+        error: Optional[Exception],
+        seconds: float,
+    ) -> None:
+        self.node_name = node_name
+        # value is None when the job raised error
+        self.value = value
+        self.error = error
+        self.seconds = seconds
+
+
+# How many jobs may run at the same time
+# A fixed limit is always max_jobs. An adaptive limit grows by one after each job that finishes in time, up to
+# max_jobs, and is halved when a job fails, times out or is slow, since that usually means debug pods are
+# waiting on the scheduler or the image registry
+class ConcurrencyLimit:
+    def __init__(self, max_jobs: int, adaptive: bool = False) -> None:
+        self.max_jobs = max(max_jobs, 1)
+        self.adaptive = adaptive
+        self.limit = (
+            min(initial_adaptive_jobs, self.max_jobs) if adaptive else self.max_jobs
+        )
+        self.active = 0
+        # Highest limit reached
+        self.peak = self.limit
+        self.decreases = 0
+        self._fastest: Optional[float] = None
+        self._decreased_at = 0.0
+        self._condition = threading.Condition()
+
+    # Waits for a free slot, returns when the job started
+    def acquire(self) -> float:
+        with self._condition:
+            while self.active >= self.limit:
+                self._condition.wait()
+            self.active += 1
+            return time.monotonic()
+
+    def release(self, started: float, seconds: float, ok: bool) -> None:
+        with self._condition:
+            self.active -= 1
+            if self.adaptive:
+                self._adjust(started, seconds, ok)
+            self._condition.notify_all()
+
+    def _adjust(self, started: float, seconds: float, ok: bool) -> None:
+        slow = self._fastest is not None and seconds > self._fastest * slow_factor
+        if ok and (self._fastest is None or seconds < self._fastest):
+            self._fastest = seconds
+        if ok and not slow:
+            self.limit = min(self.limit + 1, self.max_jobs)
+            self.peak = max(self.peak, self.limit)
+        # Jobs that started before the last decrease ran with the old limit, they don't decrease it again
+        elif started > self._decreased_at:
+            self.limit = max(self.limit // 2, 1)
+            self.decreases += 1
+            self._decreased_at = time.monotonic()
+
+
+# Set from --parallel-jobs, --adaptive-jobs and --node-timeout
+limit = ConcurrencyLimit(3)
+
+
+def configure(max_jobs: int, timeout: float, adaptive: bool = False) -> None:
+    global limit, node_timeout
+    limit = ConcurrencyLimit(max_jobs, adaptive)
+    node_timeout = timeout if timeout > 0 else None
+
+
+def _stop(process: "subprocess.Popen[bytes]") -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=terminate_grace)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+# Like subprocess.run with capture_output and a timeout of node_timeout, or less if the deadline is closer
+# A command that times out is asked to stop first, so that oc debug can delete its debug pod, and killed if it doesn't
+# The subprocess.TimeoutExpired it raises has the output of the command up to then
+def run_command(command: List[str]) -> "subprocess.CompletedProcess[bytes]":
+    timeout = ocp_utils.deadlines.timeout(node_timeout)
+    with _processes_lock:
+        if _stopping:
+            raise ocp_utils.deadlines.DeadlineExceeded("The run is ending")
+        process = subprocess.Popen(  # nosec
+            command, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        _processes.add(process)
+    with process:
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired as e:
+            _stop(process)
+            try:
+                e.output, e.stderr = process.communicate(timeout=drain_timeout)
+            except subprocess.TimeoutExpired as drained:
+                e.output, e.stderr = drained.output, drained.stderr
+            raise
+        finally:
+            with _processes_lock:
+                _processes.discard(process)
+    return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+
+
+# Stops the commands that are still running, in parallel since each one may take terminate_grace seconds to exit
+def terminate_all() -> None:
+    global _stopping
+    with _processes_lock:
+        _stopping = True
+        processes = list(_processes)
+    if not processes:
+        return
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(processes)) as executor:
+        list(executor.map(_stop, processes))
+
+
+def _run_one(node_name: str, fn: Callable[[str], T]) -> NodeResult[T]:
+    job_limit = limit
+    started = job_limit.acquire()
+    start = time.perf_counter()
+    try:
+        result: NodeResult[T] = NodeResult(
+            node_name, fn(node_name), None, time.perf_counter() - start
+        )
+    except Exception as e:
+        result = NodeResult(node_name, None, e, time.perf_counter() - start)
+    job_limit.release(started, result.seconds, result.error is None)
+    return result
+
+
+# Yields the result of fn on each node as soon as it finishes, in the order they finish
+# An exception raised on one node (like subprocess.TimeoutExpired) is returned in its result, and doesn't stop the other nodes
+def run(node_names: Iterable[str], fn: Callable[[str], T]) -> Iterator[NodeResult[T]]:
+    node_names = list(node_names)
+    if not node_names:
+        return
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(len(node_names), limit.max_jobs)
+    ) as executor:
+        tasks = [
+            executor.submit(ocp_utils.timings.in_context(_run_one), node_name, fn)
+            for node_name in node_names
+        ]
+        for task in concurrent.futures.as_completed(tasks):
+            yield task.result()
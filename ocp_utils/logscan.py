@@ -0,0 +1,152 @@
+# Scans container logs for many patterns in a single pass
+# Checks register their patterns when they are imported, each log is then streamed once and matched against all of
+# the patterns registered for its container by the checks that run, with one combined regex
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import re
+import threading
+import ocp_utils
+
+# How many bytes of a log are read at a time
+chunk_size = 1024 * 1024
+# Samples are cut to this many characters
+max_sample_length = 500
+
+
+class Pattern:
+    def __init__(
+        self, name: str, regex: str, max_samples: int, check: Optional[str] = None
+    ) -> None:
+        self.name = name
+        self.regex = regex
+        self.max_samples = max_samples
+        self.check = check
+
+
+class ScanResult:
+    __slots__ = ("count", "samples")
+
+    def __init__(self) -> None:
+        self.count = 0
+        # The first lines that matched
+        self.samples: List[str] = []
+
+
+# Matches a fixed set of patterns against a stream of log chunks
+# Matches never span lines, so chunks are only matched up to their last newline and the rest is kept for the next chunk
+# When several patterns match at the same position, only the one that was registered first is counted
+class LogScanner:
+    def __init__(self, patterns: List[Pattern]) -> None:
+        self.patterns = {f"p{i}": pattern for i, pattern in enumerate(patterns)}
+        self.combined = re.compile(
+            "|".join(
+                f"(?P<{group}>{pattern.regex})"
+                for group, pattern in self.patterns.items()
+            ).encode()
+        )
+        self.results = {pattern.name: ScanResult() for pattern in patterns}
+        self._rest = b""
+
+    def _match(self, data: bytes) -> None:
+        for match in self.combined.finditer(data):
+            pattern = self.patterns[str(match.lastgroup)]
+            result = self.results[pattern.name]
+            result.count += 1
+            if len(result.samples) < pattern.max_samples:
+                start = data.rfind(b"\n", 0, match.start()) + 1
+                end = data.find(b"\n", match.end())
+                if end == -1:
+                    end = len(data)
+                line = data[start:end]
+                result.samples.append(
+                    line[:max_sample_length].decode(errors="replace").rstrip()
+                )
+
+    def feed(self, chunk: bytes) -> None:
+        data = self._rest + chunk
+        end = data.rfind(b"\n") + 1
+        # A line longer than a chunk is matched as it is, rather than being kept in memory until it ends
+        if not end and len(data) < chunk_size:
+            self._rest = data
+            return
+        if not end:
+            end = len(data)
+        self._match(data[:end])
+        self._rest = data[end:]
+
+    def close(self) -> Dict[str, ScanResult]:
+        if self._rest:
+            self._match(self._rest)
+            self._rest = b""
+        return self.results
+
+
+def scan(chunks: Iterable[bytes], patterns: List[Pattern]) -> Dict[str, ScanResult]:
+    if not patterns:
+        return {}
+    scanner = LogScanner(patterns)
+    for chunk in chunks:
+        scanner.feed(chunk)
+    return scanner.close()
+
+
+# (namespace, container) -> patterns to look for in the logs of that container
+_patterns: Dict[Tuple[str, str], List[Pattern]] = {}
+# Names of the checks that will run, the patterns of other checks are left out of the scans
+_selected: Optional[Set[str]] = None
+# (namespace, pod, container) -> results of the scan of that log
+_results: Dict[Tuple[str, str, str], Dict[str, ScanResult]] = {}
+_locks: Dict[Tuple[str, str, str], threading.Lock] = {}
+_locks_lock = threading.Lock()
+
+
+# name identifies the pattern in the scan results, regex is a regular expression unless literal is set
+# check is the name of the check the pattern belongs to
+def register(
+    name: str,
+    regex: str,
+    namespace: str,
+    container: str,
+    check: str,
+    literal: bool = False,
+    max_samples: int = 3,
+) -> None:
+    _patterns.setdefault((namespace, container), []).append(
+        Pattern(name, re.escape(regex) if literal else regex, max_samples, check)
+    )
+
+
+def select(checks: Iterable[str]) -> None:
+    global _selected
+    _selected = set(checks)
+
+
+def _selected_patterns(namespace: str, container: str) -> List[Pattern]:
+    return [
+        pattern
+        for pattern in _patterns.get((namespace, container), [])
+        if _selected is None or pattern.check in _selected
+    ]
+
+
+# Logs without patterns of a check that runs are never read
+def has_patterns(namespace: str, container: str) -> bool:
+    return bool(_selected_patterns(namespace, container))
+
+
+# Scans the log of a container for every pattern registered for it, each log is only scanned once per run
+# Patterns that don't match have a count of 0, and patterns registered for other containers are not in the results
+def scan_pod_log(namespace: str, name: str, container: str) -> Dict[str, ScanResult]:
+    key = (namespace, name, container)
+    with _locks_lock:
+        lock = _locks.setdefault(key, threading.Lock())
+    with lock:
+        results: Optional[Dict[str, ScanResult]] = _results.get(key)
+        if results is None:
+            results = scan(
+                ocp_utils.api.StreamPodLogs(
+                    namespace=namespace, name=name, container=container
+                ),
+                _selected_patterns(namespace, container),
+            )
+            _results[key] = results
+        return results
@@ -0,0 +1,185 @@
+# Must-gathers are usually shared as tarballs, these are read directly instead of being extracted to disk first
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, Optional, Tuple, cast
+import gzip
+import os
+import posixpath
+import shutil
+import tarfile
+import tempfile
+
+archive_suffixes = (".tar", ".tar.gz", ".tgz", ".tar.zst", ".tar.zstd")
+compressed_suffixes = (".tar.gz", ".tgz", ".tar.zst", ".tar.zstd")
+
+# Small files that are needed after the archive has been read are kept in memory
+small_file_size = 1024 * 1024
+
+
+def is_archive(path: str) -> bool:
+    return os.path.isfile(path) and path.endswith(archive_suffixes)
+
+
+# Returns the uncompressed tar stream of the archive
+def open_stream(path: str) -> IO[bytes]:
+    if path.endswith((".tar.gz", ".tgz")):
+        return cast(IO[bytes], gzip.open(path, "rb"))
+    if path.endswith((".tar.zst", ".tar.zstd")):
+        try:
+            import zstandard  # type: ignore[import-not-found,unused-ignore]
+        except ImportError:
+            raise ValueError(
+                "The zstandard Python package is needed to read .tar.zst must-gathers"
+            )
+        return cast(
+            IO[bytes],
+            zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True),
+        )
+    return open(path, "rb")
+
+
+def _read_exactly(stream: IO[bytes], size: int) -> bytes:
+    chunks = []
+    while size > 0:
+        chunk = stream.read(min(size, 1024 * 1024))
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+class Archive:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.compressed = path.endswith(compressed_suffixes)
+        # Member name -> (offset of the member data in the tar stream, size of the member)
+        self.members: Dict[str, Tuple[int, int]] = {}
+        self.files: Dict[str, bytes] = {}
+        self.root = ""
+        # Member name -> path of the copy of the member in _spool_dir
+        self.spooled: Dict[str, str] = {}
+        self._spool_dir: Optional[tempfile.TemporaryDirectory[str]] = None
+
+    # Copies a member to a temporary file, so that it can be read again without uncompressing the archive
+    def _spool(self, name: str, data: IO[bytes]) -> None:
+        if self._spool_dir is None:
+            self._spool_dir = tempfile.TemporaryDirectory(prefix="openshift-checks-")
+        path = os.path.join(self._spool_dir.name, str(len(self.spooled)))
+        with open(path, "wb") as f:
+            shutil.copyfileobj(data, f)
+        self.spooled[name] = path
+
+    # Reads the whole archive once, yielding the members that wanted() asks for
+    # Compressed archives can only be read from start to end, so this is the only full pass over the archive
+    # Members that spool() asks for are copied out of compressed archives on the way, see spool_members()
+    def scan(
+        self,
+        wanted: Callable[[str], bool],
+        keep: Callable[[str], bool],
+        spool: Callable[[str], bool] = lambda name: False,
+    ) -> Iterator[Tuple[str, tarfile.TarInfo, bytes]]:
+        self.members = {}
+        self.files = {}
+        with open_stream(self.path) as stream, tarfile.open(
+            fileobj=stream, mode="r|"
+        ) as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                name = posixpath.normpath(member.name)
+                self.members[name] = (member.offset_data, member.size)
+                if not self.root:
+                    self.root = find_root(name)
+                if self.compressed and spool(name):
+                    self._spool(name, tar.extractfile(member))  # type: ignore
+                    continue
+                if wanted(name) or (keep(name) and member.size <= small_file_size):
+                    data = tar.extractfile(member).read()  # type: ignore
+                    if keep(name):
+                        self.files[name] = data
+                    if wanted(name):
+                        yield name, member, data
+
+    # Reading a single member of a compressed archive means uncompressing everything before it
+    # Members that are read one after the other (like the pod logs) are copied out together by spool_members() first
+    def spool_members(self, names: Iterable[str]) -> None:
+        if not self.compressed:
+            return
+        remaining = {
+            name
+            for name in names
+            if name in self.members
+            and name not in self.files
+            and name not in self.spooled
+        }
+        if not remaining:
+            return
+        with open_stream(self.path) as stream, tarfile.open(
+            fileobj=stream, mode="r|"
+        ) as tar:
+            for member in tar:
+                name = posixpath.normpath(member.name)
+                if name in remaining:
+                    self._spool(name, tar.extractfile(member))  # type: ignore
+                    remaining.discard(name)
+                    if not remaining:
+                        return
+
+    def read(self, name: str) -> bytes:
+        if name in self.files:
+            return self.files[name]
+        return b"".join(self.stream(name))
+
+    # Yields the data of a member chunk_size bytes at a time, so that large members don't have to fit in memory
+    def stream(self, name: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        if name in self.files:
+            yield self.files[name]
+            return
+        if name in self.spooled:
+            with open(self.spooled[name], "rb") as f:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        return
+                    yield chunk
+        try:
+            offset, size = self.members[name]
+        except KeyError:
+            raise FileNotFoundError(f"{name} not found in {self.path}")
+        with open_stream(self.path) as stream:
+            if stream.seekable():
+                stream.seek(offset)
+            else:
+                while offset > 0:
+                    skipped = len(_read_exactly(stream, min(offset, 1024 * 1024)))
+                    if not skipped:
+                        break
+                    offset -= skipped
+            while size > 0:
+                chunk = _read_exactly(stream, min(size, chunk_size))
+                if not chunk:
+                    break
+                size -= len(chunk)
+                yield chunk
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "root": self.root,
+            "members": self.members,
+            "files": {name: data.decode() for name, data in self.files.items()},
+        }
+
+    def from_dict(self, index: Dict[str, Any]) -> None:
+        self.root = index["root"]
+        self.members = {
+            name: (member[0], member[1]) for name, member in index["members"].items()
+        }
+        self.files = {name: data.encode() for name, data in index["files"].items()}
+
+
+# The resources are inside of a folder named after the must-gather image
+def find_root(name: str) -> str:
+    parts = name.split("/")
+    for i, part in enumerate(parts[:-1]):
+        if part.startswith("quay-io-openshift-release"):
+            return "/".join(parts[: i + 1])
+    return ""
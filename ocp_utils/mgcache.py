@@ -0,0 +1,164 @@
+# Parsed must-gather files are cached on disk, so that running against the same must-gather again
+# only needs to parse the files that were added or changed since the last run
+# The parsed data is stored with marshal, which only holds plain values and can't run code when it is read back
+# The few values the YAML loader returns that marshal can't hold (dates, tuples) are stored as tagged tuples
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import argparse
+import datetime
+import hashlib
+import marshal  # nosec
+import os
+import sqlite3
+import threading
+
+# Bump this whenever the format of the cached data changes
+_schema_version = 3
+
+
+# Parse result of a file that isn't valid YAML, it is cached like any other result so that the file isn't read again
+class Unparsable:
+    pass
+
+
+# found is set to [True] if value holds anything that had to be tagged
+def _encode(value: Any, found: List[bool]) -> Any:
+    if isinstance(value, dict):
+        return {
+            _encode(key, found): _encode(item, found) for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_encode(item, found) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return type(value)(_encode(item, found) for item in value)
+    if isinstance(value, tuple):
+        found[:] = [True]
+        return ("tuple", tuple(_encode(item, found) for item in value))
+    # A datetime is also a date
+    if isinstance(value, datetime.datetime):
+        found[:] = [True]
+        return ("datetime", value.isoformat())
+    if isinstance(value, datetime.date):
+        found[:] = [True]
+        return ("date", value.isoformat())
+    if isinstance(value, Unparsable):
+        found[:] = [True]
+        return ("unparsable", None)
+    return value
+
+
+# Every tuple in tagged data is a tag
+def _decode(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {_decode(key): _decode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return type(value)(_decode(item) for item in value)
+    if isinstance(value, tuple):
+        tag, data = value
+        if tag == "tuple":
+            return tuple(_decode(item) for item in data)
+        if tag == "datetime":
+            return datetime.datetime.fromisoformat(data)
+        if tag == "date":
+            return datetime.date.fromisoformat(data)
+        return Unparsable()
+    return value
+
+
+# The cache directory is only accessible by the user, a directory that anyone else owns or can write to isn't used
+def prepare_cache_dir(path: str) -> None:
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    stat = os.stat(path)
+    if stat.st_uid != os.getuid() or stat.st_mode & 0o022:
+        raise OSError(f"{path} is not a private directory of the current user")
+
+
+def default_cache_dir() -> str:
+    return os.path.join(
+        os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+        "openshift-checks",
+    )
+
+
+class ParseCache:
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, int, int, bytes, bool]] = []
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        if (
+            self._connection.execute("PRAGMA user_version").fetchone()[0]
+            != _schema_version
+        ):
+            self._connection.execute("DROP TABLE IF EXISTS files")
+            self._connection.execute(f"PRAGMA user_version = {_schema_version}")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, data BLOB, tagged INTEGER)"
+        )
+        self._connection.commit()
+
+    # Returns (True, data) if the file was cached with the same size and modification time
+    def lookup(self, path: str, size: int, mtime: int) -> Tuple[bool, Any]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT data, tagged FROM files WHERE path = ? AND size = ? AND mtime = ?",
+                (path, size, mtime),
+            ).fetchone()
+        if row is None:
+            return False, None
+        # Data written by another version of Python may not load
+        try:
+            data = marshal.loads(row[0])  # nosec
+        except (EOFError, ValueError, TypeError):
+            return False, None
+        # Most files have nothing tagged, and don't need to be walked through again
+        return True, _decode(data) if row[1] else data
+
+    def store(self, path: str, size: int, mtime: int, data: Any) -> None:
+        found = [False]
+        encoded = marshal.dumps(_encode(data, found))
+        with self._lock:
+            self._pending.append((path, size, mtime, encoded, found[0]))
+
+    # Removes every cached file that isn't in paths
+    def prune(self, paths: Iterable[str]) -> None:
+        keep = set(paths)
+        with self._lock:
+            stale = [
+                (row[0],)
+                for row in self._connection.execute("SELECT path FROM files")
+                if row[0] not in keep
+            ]
+            self._connection.executemany("DELETE FROM files WHERE path = ?", stale)
+            self._connection.commit()
+
+    def commit(self) -> None:
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)", self._pending
+            )
+            self._connection.commit()
+            self._pending = []
+
+
+_caches: Dict[str, ParseCache] = {}
+
+
+# There is one cache file per must-gather, named after the absolute path of the must-gather
+# Returns None if caching is disabled, or if the cache directory can't be used
+def open_cache(args: argparse.Namespace, mg_path: str) -> Optional[ParseCache]:
+    if args.no_cache:
+        return None
+    mg_path = os.path.abspath(mg_path)
+    if mg_path not in _caches:
+        name = hashlib.sha256(mg_path.encode()).hexdigest()
+        try:
+            prepare_cache_dir(args.cache_dir)
+            _caches[mg_path] = ParseCache(
+                os.path.join(args.cache_dir, f"{name}.sqlite")
+            )
+        except (OSError, sqlite3.Error) as e:
+            if not args.results_only:
+                print(f"Could not open the must-gather cache: {e}")
+            return None
+    return _caches[mg_path]
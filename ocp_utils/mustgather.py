@@ -1,32 +1,138 @@
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Deque, Iterator, Optional, Set, Tuple
 import os
+import collections
 import concurrent.futures
+import multiprocessing
+import posixpath
 import yaml
 import argparse
 import json
 import dateutil.parser
+import threading
+import ocp_utils.logscan
+import ocp_utils.mgarchive
+import ocp_utils.mgcache
+import ocp_utils.selectors
 
-mg_resources: List[Dict[str, Any]] = []
+# libyaml is a lot faster than the pure Python parser, use it when it is available
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader  # type: ignore
+
+
+# Resources are indexed by (apiVersion, kind), then by namespace, then by name
+# Labels get their own index, so that label selectors don't have to look at every resource
+class ResourceStore:
+    def __init__(self) -> None:
+        self.resources: Dict[Tuple[str, str], Dict[str, Dict[str, Dict[str, Any]]]] = {}
+        self.labels: Dict[
+            Tuple[str, str], Dict[Tuple[str, str], Set[Tuple[str, str]]]
+        ] = {}
+        # Resources can be loaded while checks running in other threads are looking them up
+        self.lock = threading.Lock()
+
+    # The same object can show up in several files of a must-gather
+    # When that happens, the copy with the highest resourceVersion is kept
+    def add(self, resource: Dict[str, Any]) -> bool:
+        with self.lock:
+            return self._add(resource)
+
+    def _add(self, resource: Dict[str, Any]) -> bool:
+        api_kind = (resource["apiVersion"], resource["kind"])
+        namespace = resource["metadata"].get("namespace", "")
+        name = resource["metadata"]["name"]
+        names = self.resources.setdefault(api_kind, {}).setdefault(namespace, {})
+        label_index = self.labels.setdefault(api_kind, {})
+        existing = names.get(name)
+        if existing is not None:
+            if not is_newer(resource, existing):
+                return False
+            for label in (existing["metadata"].get("labels") or {}).items():
+                label_index[label].discard((namespace, name))
+        names[name] = resource
+        for label in (resource["metadata"].get("labels") or {}).items():
+            label_index.setdefault(label, set()).add((namespace, name))
+        return True
+
+    def find(
+        self,
+        api_kind: Tuple[str, str],
+        namespace: Optional[str] = None,
+        name: Optional[str] = None,
+        labels: Optional[List[Tuple[str, str]]] = None,
+    ) -> List[Dict[str, Any]]:
+        with self.lock:
+            return self._find(api_kind, namespace, name, labels)
+
+    def _find(
+        self,
+        api_kind: Tuple[str, str],
+        namespace: Optional[str],
+        name: Optional[str],
+        labels: Optional[List[Tuple[str, str]]],
+    ) -> List[Dict[str, Any]]:
+        namespaces = self.resources.get(api_kind, {})
+        if labels:
+            label_index = self.labels.get(api_kind, {})
+            keys = set.intersection(
+                *(label_index.get(label, set()) for label in labels)
+            )
+            return [
+                namespaces[key[0]][key[1]]
+                for key in sorted(keys)
+                if (namespace is None or key[0] == namespace)
+                and (name is None or key[1] == name)
+            ]
+        if namespace is not None:
+            buckets = [namespaces.get(namespace, {})]
+        else:
+            buckets = list(namespaces.values())
+        if name is not None:
+            return [bucket[name] for bucket in buckets if name in bucket]
+        return [resource for bucket in buckets for resource in bucket.values()]
+
+
+# resourceVersion is meant to be opaque, but in practice it is an etcd revision
+# If either version isn't a number, the copy that was read first is kept
+def is_newer(resource: Dict[str, Any], existing: Dict[str, Any]) -> bool:
+    try:
+        return int(resource["metadata"]["resourceVersion"]) > int(
+            existing["metadata"]["resourceVersion"]
+        )
+    except (KeyError, TypeError, ValueError):
+        return False
+
+
+mg_store = ResourceStore()
 mg_alerts: List[Dict[str, Any]] = []
 mg_path: str = ""
+mg_archive: Optional[ocp_utils.mgarchive.Archive] = None
+mg_loader: Optional["LazyLoader"] = None
+
+alerts_paths = ["monitoring/prometheus/rules.json", "monitoring/alerts.json"]
 
 
-def load_yaml(path: str, args: argparse.Namespace) -> Any:
+def parse_yaml(content: Any) -> Any:
+    try:
+        return yaml.load(content, Loader=SafeLoader)
+    except (
+        yaml.constructor.ConstructorError,
+        yaml.scanner.ScannerError,
+        yaml.parser.ParserError,
+    ):
+        return ocp_utils.mgcache.Unparsable()
+
+
+def load_yaml(path: str) -> Any:
     with open(path, "r") as resource:
-        try:
-            return yaml.safe_load(resource)
-        except (
-            yaml.constructor.ConstructorError,
-            yaml.scanner.ScannerError,
-            yaml.parser.ParserError,
-        ):
-            if not args.results_only:
-                print(f"Could not parse: {path}")
-            return None
+        return parse_yaml(resource)
 
 
 def get_root_dir() -> str:
+    if mg_archive:
+        return mg_archive.root
     try:
         return os.path.join(
             mg_path,
@@ -40,9 +146,26 @@ def get_root_dir() -> str:
         return mg_path
 
 
+# Reads a file from the must-gather, the path is relative to the root dir
+def read_file(path: str) -> str:
+    if mg_archive:
+        return mg_archive.read(posixpath.join(get_root_dir(), path)).decode()
+    with open(os.path.join(get_root_dir(), path), "r") as f:
+        return f.read()
+
+
 def get_time() -> datetime:
-    with open(os.path.join(get_root_dir(), "timestamp"), "r") as f:
-        return dateutil.parser.parse(f.readline().rsplit(" ", 2)[0])
+    return dateutil.parser.parse(
+        read_file("timestamp").splitlines()[0].rsplit(" ", 2)[0]
+    )
+
+
+# Worker processes are spawned rather than forked, since other threads of this process (checks, fan-outs) may be
+# holding locks that a forked child would inherit locked
+def _process_pool() -> concurrent.futures.ProcessPoolExecutor:
+    return concurrent.futures.ProcessPoolExecutor(
+        mp_context=multiprocessing.get_context("spawn")
+    )
 
 
 # This function unpacks lists and imports resources one by one
@@ -52,58 +175,259 @@ def recurse_output(output: Dict[str, Any]) -> None:
             for item in output["items"]:
                 recurse_output(item)
     else:
-        found = False
-        for resource in mg_resources:
-            if (
-                output["kind"] == resource["kind"]
-                and output["apiVersion"] == resource["apiVersion"]
-                and output["metadata"].get("namespace")
-                == resource["metadata"].get("namespace")
-                and output["metadata"]["name"] == resource["metadata"]["name"]
-            ):
-                found = True
-        if found is False:
-            mg_resources.append(output)
-        return
+        mg_store.add(output)
+
+
+# Adds the resources of a parsed file to the store, the file may come from the cache
+def add_output(output: Any, path: str, args: argparse.Namespace) -> None:
+    if isinstance(output, ocp_utils.mgcache.Unparsable):
+        if not args.results_only:
+            print(f"Could not parse: {path}")
+    elif output:
+        recurse_output(output)
+
+
+# Parses YAML files and adds the resources in them to the store
+# Files that haven't changed since the last run are read from the cache
+def parse_files(
+    paths: List[str],
+    args: argparse.Namespace,
+    cache: Optional[ocp_utils.mgcache.ParseCache],
+) -> None:
+    cached: Dict[str, Any] = {}
+    stats: Dict[str, os.stat_result] = {}
+    if cache:
+        for path in paths:
+            stats[path] = os.stat(path)
+            found, data = cache.lookup(
+                os.path.relpath(path, mg_path),
+                stats[path].st_size,
+                stats[path].st_mtime_ns,
+            )
+            if found:
+                cached[path] = data
+    to_parse = [path for path in paths if path not in cached]
+
+    parsed: Dict[str, Any] = {}
+    if len(to_parse) > 64:
+        # Lots of YAML files are read in multiple processes
+        with _process_pool() as executor:
+            parsed = dict(
+                zip(
+                    to_parse,
+                    executor.map(load_yaml, to_parse, chunksize=16),
+                )
+            )
+    else:
+        parsed = {path: load_yaml(path) for path in to_parse}
+    if cache:
+        for path in to_parse:
+            cache.store(
+                os.path.relpath(path, mg_path),
+                stats[path].st_size,
+                stats[path].st_mtime_ns,
+                parsed[path],
+            )
+        cache.commit()
+
+    for path in paths:
+        add_output(cached[path] if path in cached else parsed[path], path, args)
+
+
+# The layout of a must-gather tells what kind of resources a file holds, for example:
+#   namespaces/<namespace>/core/pods.yaml
+#   namespaces/<namespace>/pods/<pod>/<pod>.yaml
+#   namespaces/<namespace>/<namespace>.yaml
+#   cluster-scoped-resources/core/nodes/<node>.yaml
+# The file name, its folder and the folder above that are used as keys, one of them is the plural name of the kind
+def layout_keys(path: str) -> Set[str]:
+    parts = os.path.normpath(path).split(os.sep)
+    parts[-1] = parts[-1][: -len(".yaml")]
+    return set(parts[-3:])
+
+
+# Files are only parsed when a resource of their kind is first asked for
+class LazyLoader:
+    def __init__(
+        self,
+        paths: List[str],
+        args: argparse.Namespace,
+        cache: Optional[ocp_utils.mgcache.ParseCache],
+    ) -> None:
+        self.args = args
+        self.cache = cache
+        self.lock = threading.Lock()
+        self.files: Dict[str, List[str]] = {}
+        self.loaded: Set[str] = set()
+        self.parsed: Set[str] = set()
+        for path in paths:
+            for key in layout_keys(path):
+                self.files.setdefault(key, []).append(path)
+
+    def load(self, plural: str) -> None:
+        with self.lock:
+            if plural in self.loaded:
+                return
+            paths = [
+                path for path in self.files.get(plural, []) if path not in self.parsed
+            ]
+            parse_files(paths, self.args, self.cache)
+            self.parsed.update(paths)
+            self.loaded.add(plural)
+
+
+def read_must_gather_folder(args: argparse.Namespace) -> None:
+    global mg_loader
+    paths: List[str] = []
+    for root, dirs, files in os.walk(mg_path):
+        # Walk in a fixed order, so that duplicate objects are always resolved the same way
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith(".yaml"):
+                paths.append(os.path.join(root, name))
+    cache = ocp_utils.mgcache.open_cache(args, mg_path)
+    if cache:
+        cache.prune(os.path.relpath(path, mg_path) for path in paths)
+    mg_loader = LazyLoader(paths, args, cache)
+
+
+# Files the checks need besides the YAML resources, these are small enough to keep in memory
+def is_small_file(name: str) -> bool:
+    return posixpath.basename(name) == "timestamp" or name.endswith(tuple(alerts_paths))
+
+
+# Pod logs that a check will scan, their path is
+# <root>/namespaces/<namespace>/pods/<pod>/<container>/<container>/logs/current.log
+def is_scanned_log(name: str) -> bool:
+    parts = name.split("/")
+    return (
+        len(parts) >= 8
+        and parts[-8] == "namespaces"
+        and parts[-6] == "pods"
+        and parts[-2:] == ["logs", "current.log"]
+        and ocp_utils.logscan.has_patterns(parts[-7], parts[-4])
+    )
+
+
+_logs_spooled = False
+_logs_lock = threading.Lock()
+
+
+# The logs are copied out of a compressed archive together, rather than uncompressing the archive again for each log
+# This is already done while the archive is scanned, unless everything else came from the cache
+def _spool_logs() -> None:
+    global _logs_spooled
+    with _logs_lock:
+        if mg_archive and not _logs_spooled:
+            mg_archive.spool_members(
+                name for name in mg_archive.members if is_scanned_log(name)
+            )
+            _logs_spooled = True
+
+
+def read_must_gather_archive(args: argparse.Namespace) -> None:
+    assert mg_archive is not None  # nosec
+    cache = ocp_utils.mgcache.open_cache(args, mg_path)
+    stat = os.stat(mg_path)
+    # If the archive hasn't changed since the last run, everything comes from the cache and it doesn't need to be uncompressed at all
+    if cache:
+        found, index = cache.lookup("", stat.st_size, stat.st_mtime_ns)
+        if found:
+            outputs: List[Tuple[str, Any]] = []
+            for name, size, mtime in index["yaml"]:
+                found, output = cache.lookup(name, size, mtime)
+                if not found:
+                    break
+                outputs.append((name, output))
+            else:
+                mg_archive.from_dict(index["archive"])
+                for name, output in outputs:
+                    add_output(output, name, args)
+                return
+
+    yaml_members: List[List[Any]] = []
+    pending: Deque[Tuple[List[Any], Any]] = collections.deque()
+
+    def finish(member: List[Any], output: Any) -> None:
+        if isinstance(output, concurrent.futures.Future):
+            output = output.result()
+            if cache:
+                cache.store(member[0], member[1], member[2], output)
+        add_output(output, member[0], args)
+
+    # YAML members are parsed in multiple processes while the archive is still being read
+    with _process_pool() as executor:
+        for name, info, data in mg_archive.scan(
+            lambda name: name.endswith(".yaml"), is_small_file, is_scanned_log
+        ):
+            member = [name, info.size, int(info.mtime)]
+            yaml_members.append(member)
+            found, output = (
+                cache.lookup(name, info.size, int(info.mtime))
+                if cache
+                else (False, None)
+            )
+            if not found:
+                output = executor.submit(parse_yaml, data)
+            pending.append((member, output))
+            # Don't let parsed resources pile up in memory if the workers are faster than the archive
+            while len(pending) > 256:
+                finish(*pending.popleft())
+        while pending:
+            finish(*pending.popleft())
+
+    if cache:
+        cache.store(
+            "",
+            stat.st_size,
+            stat.st_mtime_ns,
+            {"yaml": yaml_members, "archive": mg_archive.to_dict()},
+        )
+        cache.commit()
+        cache.prune([""] + [member[0] for member in yaml_members])
 
 
 def read_must_gather(args: argparse.Namespace) -> None:
-    # YAML files are read in multiple processes
-    with concurrent.futures.ProcessPoolExecutor() as executor:
-        tasks = []
-        for root, dirs, files in os.walk(mg_path):
-            for name in files:
-                if name.endswith(".yaml"):
-                    tasks.append(
-                        executor.submit(load_yaml, os.path.join(root, name), args)
-                    )
-        for task in concurrent.futures.as_completed(tasks):
-            output = task.result()
-            if output:
-                recurse_output(output)
-
-    alerts_paths = [
-        os.path.join(get_root_dir(), "monitoring/prometheus/rules.json"),
-        os.path.join(get_root_dir(), "monitoring/alerts.json"),
-    ]
+    global mg_archive
+    if ocp_utils.mgarchive.is_archive(mg_path):
+        mg_archive = ocp_utils.mgarchive.Archive(mg_path)
+        read_must_gather_archive(args)
+    else:
+        read_must_gather_folder(args)
+
     for path in alerts_paths:
         try:
-            with open(path, "r") as resource:
-                mg_alerts.extend(json.load(resource)["data"]["groups"])
+            mg_alerts.extend(json.loads(read_file(path))["data"]["groups"])
             break
         except (FileNotFoundError, json.JSONDecodeError):
             pass
 
 
-def read_namespaced_pod_log(namespace: str, name: str, container: str) -> str:
-    with open(
-        os.path.join(
-            get_root_dir(),
-            f"namespaces/{namespace}/pods/{name}/{container}/{container}/logs/current.log",
-        ),
-        "r",
-    ) as log:
-        return log.read()
+def stream_namespaced_pod_log(
+    namespace: str, name: str, container: str
+) -> Iterator[bytes]:
+    path = posixpath.join(
+        "namespaces",
+        namespace,
+        "pods",
+        name,
+        container,
+        container,
+        "logs",
+        "current.log",
+    )
+    if mg_archive:
+        _spool_logs()
+        yield from mg_archive.stream(
+            posixpath.join(get_root_dir(), path), ocp_utils.logscan.chunk_size
+        )
+        return
+    with open(os.path.join(get_root_dir(), path), "rb") as f:
+        while True:
+            chunk = f.read(ocp_utils.logscan.chunk_size)
+            if not chunk:
+                return
+            yield chunk
 
 
 def get_alerts() -> List[Any]:
@@ -115,73 +439,37 @@ def get_alerts() -> List[Any]:
     return firing_alerts
 
 
-class dotdict(Dict[str, Any]):
-    """dot.notation access to dictionary attributes"""
-
-    def __getattr__(*args: Any) -> Any:
-        val = dict.get(*args)
-        return dotdict(val) if type(val) is dict else val
-
-    __setattr__: Any = dict.__setitem__
-    __delattr__: Any = dict.__delitem__
-
-
 class MustGather:
-    def __init__(self, api_version: str, kind: str) -> None:
-        self.api_kind = {"apiVersion": api_version, "kind": kind}
-
-    # Very basic parser for field selectors
-    def get_field_value(self, base: Dict[str, Any], field: str, labels: bool) -> Any:
-        if field.startswith("!"):
-            field = field[1:]
-        field = field.split("!=")[0]
-        field = field.split("=")[0]
-        if labels is True:
-            return base.get(field)
-        dotted_base = dotdict(base)  # noqa: F841
-        try:
-            return eval(f"dotted_base.{field}")  # nosec
-        except AttributeError:
-            return None
-
-    def parse_selector(
-        self, selector: str, items: List[Dict[str, Any]], labels: bool
-    ) -> None:
-        selector = selector.replace("==", "=")
-        for item in list(items):
-            if labels:
-                base = item["metadata"].get("labels", {})
-            else:
-                base = item
-            for field in selector.split(","):
-                parsed_field = self.get_field_value(base, field, labels)
-                if field.startswith("!"):
-                    if parsed_field is not None:
-                        items.remove(item)
-                elif "!=" in field:
-                    if parsed_field == field.split("!=")[1]:
-                        items.remove(item)
-                elif "=" in field:
-                    if parsed_field != field.split("=")[1]:
-                        items.remove(item)
+    # plural is the lowercase plural name of the kind, as used in the must-gather layout
+    def __init__(self, api_version: str, kind: str, plural: str = "") -> None:
+        self.api_kind = (api_version, kind)
+        self.plural = plural if plural else f"{kind.lower()}s"
 
     def get(
-        self, label_selector: str = "", field_selector: str = "", **kwargs: str
+        self, label_selector: str = "", field_selector: str = "", **kwargs: Any
     ) -> Any:
-        items: List[Dict[str, Any]] = []
-        for resource in mg_resources:
-            if (
-                self.api_kind.items() <= resource.items()
-                and kwargs.items() <= resource.get("metadata", {}).items()
-            ):
-                if resource not in items:
-                    items.append(resource)
-
-        if label_selector:
-            self.parse_selector(label_selector, items, True)
-        if field_selector:
-            self.parse_selector(field_selector, items, False)
-        if not kwargs.get("name"):
+        if mg_loader:
+            mg_loader.load(self.plural)
+        # Everything is already in memory, so the whole list is returned as a single page
+        # Must-gathers only have full objects, so asking for metadata or a table returns the full objects too
+        for option in ("limit", "_continue", "header_params"):
+            kwargs.pop(option, None)
+        name = kwargs.pop("name", None)
+        items = mg_store.find(
+            self.api_kind,
+            namespace=kwargs.pop("namespace", None),
+            name=name,
+            labels=ocp_utils.selectors.parse_label_selector(
+                label_selector
+            ).equalities(),
+        )
+        if kwargs:
+            items = [
+                item for item in items if kwargs.items() <= item["metadata"].items()
+            ]
+
+        items = ocp_utils.selectors.filter_items(items, label_selector, field_selector)
+        if not name:
             return {"items": items}
         elif len(items) > 0:
             return items[0]
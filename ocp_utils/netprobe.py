@@ -0,0 +1,122 @@
+# Checks that names resolve, and that every address they resolve to accepts TCP connections
+# Names are resolved in parallel, and the addresses of a name are all connected to at the same time as soon as it
+# is resolved, so an unreachable address costs one timeout for the whole probe rather than one timeout each
+from typing import Dict, List, Optional, Sequence, Tuple
+import concurrent.futures
+import socket
+import time
+import ocp_utils
+
+# Lookups and connections that run at the same time
+max_workers = 16
+
+
+class ConnectResult:
+    def __init__(
+        self,
+        name: str,
+        port: int,
+        family: socket.AddressFamily,
+        address: Optional[str],
+        seconds: Optional[float],
+        error: Optional[str],
+    ) -> None:
+        self.name = name
+        self.port = port
+        self.family = family
+        # None when the name didn't resolve
+        self.address = address
+        # How long the connection took to open, None when it failed
+        self.seconds = seconds
+        self.error = error
+
+
+def family_name(family: socket.AddressFamily) -> str:
+    return "IPv4" if family == socket.AF_INET else "IPv6"
+
+
+# Every address of the name in the given family, in the order the resolver returned them
+def resolve(name: str, port: int, family: socket.AddressFamily) -> List[str]:
+    addresses: List[str] = []
+    for info in socket.getaddrinfo(name, port, family=family, type=socket.SOCK_STREAM):
+        address = str(info[4][0])
+        if address not in addresses:
+            addresses.append(address)
+    return addresses
+
+
+# Returns how many seconds the connection took to open
+def connect(
+    address: str, port: int, family: socket.AddressFamily, timeout: Optional[float]
+) -> float:
+    start = time.perf_counter()
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect((address, port))
+    return time.perf_counter() - start
+
+
+# Resolves each (name, port) of targets in each of families, and connects to every address
+# Lookups and connections each get timeout seconds (None for no limit), or less if the deadline is closer
+# There is one result per address, or a single result without an address for a name that didn't resolve
+def probe(
+    targets: Sequence[Tuple[str, int]],
+    families: Sequence[socket.AddressFamily],
+    timeout: Optional[float],
+) -> List[ConnectResult]:
+    results: List[ConnectResult] = []
+    lookup_timeout = ocp_utils.deadlines.timeout(timeout)
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        lookups = {
+            executor.submit(resolve, name, port, family): (name, port, family)
+            for name, port in targets
+            for family in families
+        }
+        connections: Dict[
+            "concurrent.futures.Future[float]",
+            Tuple[str, int, socket.AddressFamily, str],
+        ] = {}
+        try:
+            for lookup in concurrent.futures.as_completed(
+                lookups, timeout=lookup_timeout
+            ):
+                name, port, family = lookups[lookup]
+                try:
+                    addresses = lookup.result()
+                except OSError as e:
+                    results.append(
+                        ConnectResult(name, port, family, None, None, str(e))
+                    )
+                    continue
+                connect_timeout = ocp_utils.deadlines.timeout(timeout)
+                for address in addresses:
+                    task = executor.submit(
+                        connect, address, port, family, connect_timeout
+                    )
+                    connections[task] = (name, port, family, address)
+        # getaddrinfo() has no timeout of its own, lookups that are still running are left behind
+        except concurrent.futures.TimeoutError:
+            for lookup, (name, port, family) in lookups.items():
+                if not lookup.done():
+                    results.append(
+                        ConnectResult(
+                            name, port, family, None, None, "DNS lookup timed out"
+                        )
+                    )
+        for task, (name, port, family, address) in connections.items():
+            try:
+                results.append(
+                    ConnectResult(name, port, family, address, task.result(), None)
+                )
+            except OSError as e:
+                results.append(
+                    ConnectResult(
+                        name, port, family, address, None, str(e) or type(e).__name__
+                    )
+                )
+    finally:
+        executor.shutdown(wait=False)
+    return sorted(
+        results, key=lambda result: (result.name, result.family, result.address or "")
+    )
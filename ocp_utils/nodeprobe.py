@@ -0,0 +1,174 @@
+# Runs the shell commands of every check on a node in a single oc debug session
+# Checks register their probes when they are imported, the first check that asks for the results starts one
+# session per node with all of the probes in it, and every check then reads its own probes from the results
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+import subprocess  # nosec
+import threading
+import time
+import uuid
+import ocp_utils
+
+
+class Probe:
+    # command returns the shell command to run on a node, or None to not run the probe on that node
+    def __init__(
+        self, name: str, command: Callable[[str], Optional[str]], check: str
+    ) -> None:
+        self.name = name
+        self.command = command
+        self.check = check
+
+
+class ProbeResult:
+    __slots__ = ("output", "exit_code")
+
+    def __init__(self, output: str, exit_code: int) -> None:
+        # Standard output of the command
+        self.output = output
+        self.exit_code = exit_code
+
+
+_probes: List[Probe] = []
+# Names of the checks that will run, the probes of other checks are left out of the sessions
+_selected: Optional[Set[str]] = None
+# node name -> probe name -> result, probes that didn't finish on a node are missing from its results
+_results: Optional[Dict[str, Dict[str, ProbeResult]]] = None
+# (node name, probe name) -> what the command of the probe raised, it is raised again to the check of the probe
+_errors: Dict[Tuple[str, str], Exception] = {}
+_lock = threading.Lock()
+
+
+# name can't contain spaces, check is the name of the check the probe belongs to
+def register(name: str, command: Callable[[str], Optional[str]], check: str) -> None:
+    _probes.append(Probe(name, command, check))
+
+
+def select(checks: Iterable[str]) -> None:
+    global _selected
+    _selected = set(checks)
+
+
+# Each probe runs in its own subshell, with its output between two marker lines
+# The marker is random, so that it can't be confused with the output of a command
+def build_script(commands: Dict[str, str], marker: str) -> str:
+    return "\n".join(
+        f"echo '{marker} {name} BEGIN'; ( {command} ) 2>/dev/null; echo \"{marker} {name} END $?\""
+        for name, command in commands.items()
+    )
+
+
+def parse_output(output: str, marker: str) -> Dict[str, ProbeResult]:
+    results: Dict[str, ProbeResult] = {}
+    name: Optional[str] = None
+    lines: List[str] = []
+    for line in output.splitlines():
+        if not line.startswith(f"{marker} "):
+            if name is not None:
+                lines.append(line)
+            continue
+        fields = line.split(" ")
+        if len(fields) == 3 and fields[2] == "BEGIN":
+            name = fields[1]
+            lines = []
+        elif len(fields) == 4 and fields[2] == "END" and fields[1] == name:
+            results[name] = ProbeResult("\n".join(lines), int(fields[3]))
+            name = None
+    return results
+
+
+# Raised when a session timed out, with the results of the probes that finished before that
+class SessionTimeout(Exception):
+    def __init__(self, node_name: str, results: Dict[str, ProbeResult]) -> None:
+        super().__init__(f"oc debug timed out on node/{node_name}")
+        self.results = results
+
+
+# The session is stopped if it takes longer than --node-timeout
+def _run_session(node_name: str, commands: Dict[str, str]) -> Dict[str, ProbeResult]:
+    marker = f"probe-{uuid.uuid4().hex}"
+    start = time.perf_counter()
+    try:
+        output = ocp_utils.fanout.run_command(
+            [
+                "oc",
+                "debug",
+                f"node/{node_name}",
+                "--",
+                "chroot",
+                "/host",
+                "sh",
+                "-c",
+                build_script(commands, marker),
+            ]
+        )
+    except subprocess.TimeoutExpired as e:
+        raise SessionTimeout(
+            node_name, parse_output((e.output or b"").decode(errors="replace"), marker)
+        )
+    finally:
+        ocp_utils.timings.record("oc_debug", time.perf_counter() - start)
+    results = parse_output(output.stdout.decode(errors="replace"), marker)
+    # oc debug couldn't start the session, for example because the debug pod couldn't be scheduled
+    if not results and output.returncode != 0:
+        error = output.stderr.decode(errors="replace").strip().splitlines()
+        raise RuntimeError(
+            f"oc debug failed on node/{node_name}: {error[-1] if error else output.returncode}"
+        )
+    return results
+
+
+# A probe whose command can't be built is left out of the session, and only fails its own check
+# The commands are built for their checks, so each of them is bound by the check timeout
+def _node_commands(node_name: str) -> Dict[str, str]:
+    commands: Dict[str, str] = {}
+    for probe in _probes:
+        if _selected is not None and probe.check not in _selected:
+            continue
+        try:
+            with ocp_utils.deadlines.limit(ocp_utils.deadlines.check_timeout):
+                command = probe.command(node_name)
+        except Exception as e:
+            _errors[(node_name, probe.name)] = e
+            continue
+        if command is not None:
+            commands[probe.name] = command
+    return commands
+
+
+# Results of every selected probe on every ready node, the sessions only run once per run
+# Sessions run through ocp_utils.fanout, so at most --parallel-jobs of them at a time
+# Checks running at the same time wait for the first one to finish the sessions, and the oc debug time is
+# recorded in the timings of that first check
+# The sessions are only bound by --node-timeout and the run deadline, since the other checks need them even if
+# the first check runs out of time
+def results() -> Dict[str, Dict[str, ProbeResult]]:
+    global _results
+    with _lock, ocp_utils.deadlines.shared():
+        if _results is None:
+            sessions = {
+                node.name: _node_commands(node.name)
+                for node in ocp_utils.utils.ready_nodes()
+            }
+            node_results: Dict[str, Dict[str, ProbeResult]] = {}
+            # Nodes where the session failed have no results, and nodes where it timed out only have the results of
+            # the probes that finished
+            for result in ocp_utils.fanout.run(
+                [name for name, commands in sessions.items() if commands],
+                lambda name: _run_session(name, sessions[name]),
+            ):
+                if result.value is not None:
+                    node_results[result.node_name] = result.value
+                elif isinstance(result.error, SessionTimeout):
+                    node_results[result.node_name] = result.error.results
+            _results = node_results
+        return _results
+
+
+# The result of one probe on one node, or None if it didn't run or didn't finish there
+# Raises what the command of the probe raised on that node
+def result(node_name: str, probe: str) -> Optional[ProbeResult]:
+    node_results = results().get(node_name, {})
+    error = _errors.get((node_name, probe))
+    if error is not None:
+        raise error
+    return node_results.get(probe)
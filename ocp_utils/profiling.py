@@ -0,0 +1,23 @@
+# With --profile, initialization and each check are profiled separately, and the stats are written to <dir>/<name>.pstats
+# The files can be read with the pstats module, or turned into flamegraphs with tools such as flameprof or snakeviz
+# Only the thread running the check is profiled, work done in worker processes doesn't show up
+from typing import Iterator
+import argparse
+import contextlib
+import cProfile
+import os
+
+
+@contextlib.contextmanager
+def profile(args: argparse.Namespace, name: str) -> Iterator[None]:
+    if not args.profile:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(args.profile, exist_ok=True)
+        profiler.dump_stats(os.path.join(args.profile, f"{name}.pstats"))
@@ -0,0 +1,79 @@
+# Client for the Prometheus HTTP API
+# Connections are shared between queries, and several queries can be sent at the same time
+from typing import Any, Dict, List, Sequence
+import concurrent.futures
+import time
+import requests
+import ocp_utils.deadlines
+import ocp_utils.timings
+from requests.adapters import HTTPAdapter
+
+_retry_statuses = (429, 500, 502, 503, 504)
+
+
+class PrometheusClient:
+    def __init__(
+        self,
+        url: str,
+        bearer: str,
+        timeout: float = 30,
+        pool_size: int = 8,
+        retries: int = 3,
+        backoff: float = 0.5,
+    ) -> None:
+        self.url = url
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff = backoff
+        adapter = HTTPAdapter(pool_maxsize=pool_size)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.verify = False  # nosec
+        self.session.headers["Authorization"] = bearer
+
+    # Prometheus queries are read only, so it is safe to retry them even though they are POSTs
+    # Failed connections and busy or failing servers are retried, a query that timed out is not, and every attempt
+    # gets the time left before the deadline, so that no attempt is started after it
+    def request(self, method: str, path: str, **kwargs: Any) -> Any:
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            start = time.perf_counter()
+            try:
+                resp = self.session.request(
+                    method,
+                    f"{self.url}{path}",
+                    timeout=ocp_utils.deadlines.timeout(self.timeout),
+                    **kwargs,
+                )
+            except requests.ConnectionError:
+                if last:
+                    raise
+            else:
+                ocp_utils.timings.record(
+                    "prometheus", time.perf_counter() - start, len(resp.content)
+                )
+                if last or resp.status_code not in _retry_statuses:
+                    resp.raise_for_status()
+                    return resp.json()
+            pause = self.backoff * 2**attempt
+            left = ocp_utils.deadlines.remaining()
+            time.sleep(pause if left is None else max(0, min(pause, left)))
+
+    def query(self, query: str) -> List[Dict[str, Any]]:
+        return list(
+            self.request("POST", "/api/v1/query", params={"query": query})["data"][
+                "result"
+            ]
+        )
+
+    # Sends the queries at the same time, the results are in the same order as the queries
+    def query_many(self, queries: Sequence[str]) -> List[List[Dict[str, Any]]]:
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.pool_size
+        ) as executor:
+            return list(executor.map(ocp_utils.timings.in_context(self.query), queries))
+
+    def rules(self) -> List[Dict[str, Any]]:
+        return list(self.request("GET", "/api/v1/rules")["data"]["groups"])
@@ -0,0 +1,116 @@
+# Pods and nodes are kept for the whole run, so only the fields that the checks read are kept
+# Each API object is turned into a small record as soon as its page arrives, and the full object is dropped
+from typing import Any, Callable, Dict, List, Optional
+
+
+# Works with the dicts read from a must-gather, and the ResourceFields returned by the API server
+def _get(obj: Any, *path: str) -> Any:
+    for key in path:
+        if obj is None:
+            return None
+        obj = obj.get(key)
+    return obj
+
+
+class ConditionRecord:
+    __slots__ = ("type", "status", "message")
+
+    def __init__(self, condition: Any) -> None:
+        self.type: str = condition.get("type")
+        self.status: str = condition.get("status")
+        self.message: Optional[str] = condition.get("message")
+
+
+def _conditions(obj: Any) -> List[ConditionRecord]:
+    return [ConditionRecord(item) for item in _get(obj, "status", "conditions") or []]
+
+
+def _condition(
+    conditions: List[ConditionRecord], condition_type: str
+) -> Optional[ConditionRecord]:
+    return next((item for item in conditions if item.type == condition_type), None)
+
+
+class ContainerRecord:
+    __slots__ = ("name", "terminated_reason", "terminated_finished_at")
+
+    def __init__(self, container: Any) -> None:
+        self.name: str = container.get("name")
+        # The last time the container terminated, if it ever did
+        self.terminated_reason: Optional[str] = _get(
+            container, "lastState", "terminated", "reason"
+        )
+        self.terminated_finished_at: Optional[str] = _get(
+            container, "lastState", "terminated", "finishedAt"
+        )
+
+
+class PodRecord:
+    __slots__ = (
+        "name",
+        "namespace",
+        "labels",
+        "deletion_timestamp",
+        "node_name",
+        "phase",
+        "status_message",
+        "conditions",
+        "containers",
+    )
+
+    def __init__(self, pod: Any) -> None:
+        self.name: str = _get(pod, "metadata", "name")
+        self.namespace: str = _get(pod, "metadata", "namespace")
+        self.labels: Dict[str, str] = dict(_get(pod, "metadata", "labels") or {})
+        self.deletion_timestamp: Optional[str] = _get(
+            pod, "metadata", "deletionTimestamp"
+        )
+        self.node_name: str = _get(pod, "spec", "nodeName") or ""
+        self.phase: Optional[str] = _get(pod, "status", "phase")
+        self.status_message: Optional[str] = _get(pod, "status", "message")
+        self.conditions = _conditions(pod)
+        self.containers = [
+            ContainerRecord(item)
+            for item in _get(pod, "status", "containerStatuses") or []
+        ]
+
+    def condition(self, condition_type: str) -> Optional[ConditionRecord]:
+        return _condition(self.conditions, condition_type)
+
+
+class NodeRecord:
+    __slots__ = (
+        "name",
+        "labels",
+        "unschedulable",
+        "has_taints",
+        "kernel_version",
+        "cpu_capacity",
+        "cpu_allocatable",
+        "conditions",
+    )
+
+    def __init__(self, node: Any) -> None:
+        self.name: str = _get(node, "metadata", "name")
+        self.labels: Dict[str, str] = dict(_get(node, "metadata", "labels") or {})
+        self.unschedulable: Optional[bool] = _get(node, "spec", "unschedulable")
+        self.has_taints = bool(_get(node, "spec", "taints"))
+        self.kernel_version: Optional[str] = _get(
+            node, "status", "nodeInfo", "kernelVersion"
+        )
+        self.cpu_capacity: Optional[str] = _get(node, "status", "capacity", "cpu")
+        self.cpu_allocatable: Optional[str] = _get(node, "status", "allocatable", "cpu")
+        self.conditions = _conditions(node)
+
+    def condition(self, condition_type: str) -> Optional[ConditionRecord]:
+        return _condition(self.conditions, condition_type)
+
+    def is_ready(self) -> bool:
+        ready = self.condition("Ready")
+        return ready is not None and ready.status == "True"
+
+
+# The kinds in ocp_utils.snapshot that are kept as records instead of API objects
+projections: Dict[str, Callable[[Any], Any]] = {
+    "Pod": PodRecord,
+}
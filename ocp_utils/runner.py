@@ -0,0 +1,241 @@
+import argparse
+import io
+import queue
+import sys
+import threading
+import time
+from typing import Any, Callable, Iterator, Optional, Sequence
+import ocp_utils
+
+
+class CheckResult:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.result = ""
+        self.output = ""
+        self.error: Optional[Exception] = None
+
+
+# Checks print their tables straight to stdout. When several checks run at once,
+# each worker thread gets its own buffer so that the output of one check doesn't
+# end up in the middle of another one.
+class _ThreadStdout(io.TextIOBase):
+    def __init__(self, stream: Any) -> None:
+        self._stream = stream
+        self._local = threading.local()
+
+    def capture(self, buffer: Optional[io.TextIOBase]) -> None:
+        self._local.buffer = buffer
+
+    def write(self, text: str) -> int:
+        buffer = getattr(self._local, "buffer", None)
+        return int((buffer if buffer is not None else self._stream).write(text))
+
+    def flush(self) -> None:
+        self._stream.flush()
+
+
+def check_name(fn: Callable[[argparse.Namespace], str]) -> str:
+    return fn.__module__.split(".")[1]
+
+
+def run_check(
+    fn: Callable[[argparse.Namespace], str], args: argparse.Namespace
+) -> CheckResult:
+    check = CheckResult(check_name(fn))
+    if check.name in args.skip.split(","):
+        check.result = ocp_utils.utils.SKIP()
+        return check
+    try:
+        with ocp_utils.timings.measure(check.name), ocp_utils.profiling.profile(
+            args, check.name
+        ):
+            check.result = fn(args)
+    except Exception as e:
+        check.error = e
+    return check
+
+
+def _run_captured(
+    fn: Callable[[argparse.Namespace], str],
+    args: argparse.Namespace,
+    stdout: _ThreadStdout,
+) -> CheckResult:
+    buffer = io.StringIO()
+    stdout.capture(buffer)
+    try:
+        check = run_check(fn, args)
+    finally:
+        stdout.capture(None)
+    check.output = buffer.getvalue()
+    return check
+
+
+# How often run_checks looks at a check that is waiting for a worker, to start counting its time once it runs
+_poll_interval = 0.1
+
+
+# A check waiting for a worker or running on one
+class _CheckTask:
+    def __init__(
+        self, fn: Callable[[argparse.Namespace], str], args: argparse.Namespace
+    ) -> None:
+        self.fn = fn
+        self.args = args
+        self.check = CheckResult(check_name(fn))
+        # time.monotonic() when the check started running
+        self.started: Optional[float] = None
+        self.done = threading.Event()
+        # Set when run_checks stops waiting for the check, the worker running it then exits once it returns
+        self.abandoned = False
+        self.lock = threading.Lock()
+
+
+# When checks run one at a time their output is shown while they run, like when they run on the main thread
+# Once run_checks stopped waiting for the check, whatever it still prints is dropped
+class _LiveOutput(io.TextIOBase):
+    def __init__(self, stream: Any, task: _CheckTask) -> None:
+        self._stream = stream
+        self._task = task
+
+    def write(self, text: str) -> int:
+        if self._task.abandoned:
+            return len(text)
+        return int(self._stream.write(text))
+
+    def flush(self) -> None:
+        self._stream.flush()
+
+
+def _timed_out(task: _CheckTask) -> CheckResult:
+    check = CheckResult(task.check.name)
+    check.result = ocp_utils.utils.ERROR()
+    run_deadline = ocp_utils.deadlines.run_deadline
+    if task.started is None:
+        reason = "didn't start before the run timed out"
+    elif task.args.check_timeout > 0 and (
+        run_deadline is None or task.started + task.args.check_timeout < run_deadline
+    ):
+        reason = f"timed out after {task.args.check_timeout:g} seconds"
+    else:
+        reason = "was stopped when the run timed out"
+    check.output = f"{ocp_utils.utils.oc_colors['RED']}Check {check.name} {reason}{ocp_utils.utils.oc_colors['ENDC']}\n"
+    return check
+
+
+def _run_task(task: _CheckTask, stdout: _ThreadStdout) -> None:
+    task.started = time.monotonic()
+    with ocp_utils.deadlines.limit(task.args.check_timeout):
+        if task.args.check_jobs <= 1:
+            stdout.capture(_LiveOutput(stdout._stream, task))
+            try:
+                check = run_check(task.fn, task.args)
+            finally:
+                stdout.capture(None)
+        else:
+            check = _run_captured(task.fn, task.args, stdout)
+    # The check tried to start a remote call after its deadline
+    if isinstance(check.error, ocp_utils.deadlines.DeadlineExceeded):
+        check = _timed_out(task)
+    task.check = check
+
+
+# Runs checks from the queue until it is empty
+# Once the run is out of time, the checks left in the queue are reported without running them
+def _worker(tasks: "queue.Queue[_CheckTask]", stdout: _ThreadStdout) -> None:
+    while True:
+        try:
+            task = tasks.get_nowait()
+        except queue.Empty:
+            return
+        with task.lock:
+            if task.abandoned:
+                continue
+        if ocp_utils.deadlines.expired():
+            task.check = _timed_out(task)
+        else:
+            _run_task(task, stdout)
+        with task.lock:
+            task.done.set()
+            if task.abandoned:
+                return
+
+
+# Checks run in daemon threads, so that the run doesn't wait for a check that timed out to return before it ends
+def _start_worker(tasks: "queue.Queue[_CheckTask]", stdout: _ThreadStdout) -> None:
+    threading.Thread(target=_worker, args=(tasks, stdout), daemon=True).start()
+
+
+# Waits until the check is done, or until it runs out of time (--check-timeout from when it started, or --timeout)
+# Returns False if the check ran out of time
+def _wait(task: _CheckTask) -> bool:
+    check_timeout = task.args.check_timeout
+    while not task.done.is_set():
+        end = ocp_utils.deadlines.run_deadline
+        if check_timeout > 0 and task.started is not None:
+            check_end = task.started + check_timeout
+            end = check_end if end is None else min(end, check_end)
+        now = time.monotonic()
+        if end is not None and now >= end:
+            with task.lock:
+                if not task.done.is_set():
+                    task.abandoned = True
+                    return False
+            break
+        wait = None if end is None else end - now
+        if check_timeout > 0 and task.started is None:
+            wait = _poll_interval if wait is None else min(wait, _poll_interval)
+        task.done.wait(wait)
+    return True
+
+
+# Runs the checks and yields the results in the same order as the checks were given
+# announce is called right before the output of a check is shown to the user
+# Checks that time out are reported as ERROR, and a new worker takes the place of the one that is still running them
+def run_checks(
+    checks: Sequence[Callable[[argparse.Namespace], str]],
+    args: argparse.Namespace,
+    announce: Callable[[str], None],
+) -> Iterator[CheckResult]:
+    # Without timeouts, checks that run one at a time run on the main thread
+    if (
+        args.check_jobs <= 1
+        and args.check_timeout <= 0
+        and ocp_utils.deadlines.run_deadline is None
+    ):
+        for fn in checks:
+            announce(check_name(fn))
+            yield run_check(fn, args)
+        return
+
+    # When checks run one at a time, each one is only started once the previous one is shown, so that the user sees
+    # which one is running while it runs
+    live = args.check_jobs <= 1
+    tasks = [_CheckTask(fn, args) for fn in checks]
+    pending: "queue.Queue[_CheckTask]" = queue.Queue()
+    stdout = _ThreadStdout(sys.stdout)
+    sys.stdout = stdout
+    try:
+        if not live:
+            for task in tasks:
+                pending.put(task)
+            for _ in range(min(args.check_jobs, len(tasks))):
+                _start_worker(pending, stdout)
+        for task in tasks:
+            if live:
+                announce(task.check.name)
+                pending.put(task)
+                _start_worker(pending, stdout)
+            if _wait(task):
+                check = task.check
+            else:
+                check = _timed_out(task)
+                if not live:
+                    _start_worker(pending, stdout)
+            if not live:
+                announce(check.name)
+            stdout.write(check.output)
+            stdout.flush()
+            yield check
+    finally:
+        sys.stdout = stdout._stream
@@ -0,0 +1,133 @@
+# Label and field selectors, for filtering resources that are already in memory
+# Selectors are parsed once into a list of requirements, which are then checked against each item
+# Supported operators: key=value, key==value, key!=value, key, !key, key in (a,b), key notin (a,b)
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+import functools
+import re
+
+_set_term = re.compile(r"^(\S+)\s+(in|notin)\s*\((.*)\)$")
+
+
+class Requirement:
+    __slots__ = ("key", "path", "operator", "values")
+
+    def __init__(self, key: str, operator: str, values: FrozenSet[str]) -> None:
+        self.key = key
+        # Field selectors use dotted paths, label keys are looked up as a whole
+        self.path = tuple(key.split("."))
+        self.operator = operator
+        self.values = values
+
+    def matches(self, value: Any) -> bool:
+        if self.operator == "exists":
+            return value is not None
+        if self.operator == "!":
+            return value is None
+        try:
+            found = value in self.values
+        except TypeError:
+            # Lists and dicts can't be compared with a string
+            found = False
+        # != and notin also match when the key isn't there at all
+        return found if self.operator in ("=", "in") else not found
+
+
+class Selector:
+    def __init__(self, requirements: List[Requirement], labels: bool) -> None:
+        self.requirements = requirements
+        self.labels = labels
+
+    def value(self, item: Dict[str, Any], requirement: Requirement) -> Any:
+        if self.labels:
+            return (item["metadata"].get("labels") or {}).get(requirement.key)
+        value: Any = item
+        for part in requirement.path:
+            # Items are dicts when read from a must-gather, and ResourceFields when they come from the API server
+            get = getattr(value, "get", None)
+            if get is None:
+                return None
+            value = get(part)
+        return value
+
+    def matches(self, item: Dict[str, Any]) -> bool:
+        for requirement in self.requirements:
+            if not requirement.matches(self.value(item, requirement)):
+                return False
+        return True
+
+    def filter(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not self.requirements:
+            return items
+        return [item for item in items if self.matches(item)]
+
+    # key=value pairs that every matching item must have, these can be answered by an index
+    def equalities(self) -> List[Tuple[str, str]]:
+        return [
+            (requirement.key, next(iter(requirement.values)))
+            for requirement in self.requirements
+            if requirement.operator in ("=", "in") and len(requirement.values) == 1
+        ]
+
+
+# Splits on commas, except for the ones inside of the parentheses of "in" and "notin"
+def _split_terms(selector: str) -> List[str]:
+    terms: List[str] = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(selector):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            terms.append(selector[start:i])
+            start = i + 1
+    terms.append(selector[start:])
+    return [term.strip() for term in terms if term.strip()]
+
+
+def _parse_term(term: str) -> Requirement:
+    set_term = _set_term.match(term)
+    if set_term:
+        values = frozenset(
+            value.strip() for value in set_term.group(3).split(",") if value.strip()
+        )
+        return Requirement(set_term.group(1), set_term.group(2), values)
+    if term.startswith("!"):
+        return Requirement(term[1:].strip(), "!", frozenset())
+    for operator in ("!=", "==", "="):
+        if operator in term:
+            key, value = term.split(operator, 1)
+            return Requirement(
+                key.strip(),
+                "!=" if operator == "!=" else "=",
+                frozenset([value.strip()]),
+            )
+    if any(char in term for char in " ()"):
+        raise ValueError(f"Invalid selector: {term}")
+    return Requirement(term, "exists", frozenset())
+
+
+@functools.lru_cache(maxsize=None)
+def parse(selector: str, labels: bool) -> Selector:
+    return Selector([_parse_term(term) for term in _split_terms(selector)], labels)
+
+
+def parse_label_selector(selector: str) -> Selector:
+    return parse(selector, True)
+
+
+def parse_field_selector(selector: str) -> Selector:
+    return parse(selector, False)
+
+
+def filter_items(
+    items: List[Dict[str, Any]],
+    label_selector: Optional[str] = "",
+    field_selector: Optional[str] = "",
+) -> List[Dict[str, Any]]:
+    if label_selector:
+        items = parse_label_selector(label_selector).filter(items)
+    if field_selector:
+        items = parse_field_selector(field_selector).filter(items)
+    return items
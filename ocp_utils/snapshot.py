@@ -0,0 +1,43 @@
+# Kinds that several checks read are listed at most once per run, the first time a check asks for them, and kept
+# Kinds that only one check reads are streamed page by page instead, and never kept
+from typing import Any, Dict, Iterator, List, Optional
+import threading
+import ocp_utils
+
+_lists: Dict[str, List[Any]] = {}
+_locks: Dict[str, threading.Lock] = {}
+_locks_lock = threading.Lock()
+
+# How many items each LIST request asks for, set from --page-size
+page_size = 500
+
+
+# kind is the name of the resource in ocp_utils.api, for example "Pod"
+# Only use this for kinds that more than one check reads, the list is kept until the end of the run
+# Checks running at the same time wait for the first one to finish listing the kind, rather than listing it again
+# Kinds listed in ocp_utils.records.projections are kept as records rather than as full API objects
+def list_items(kind: str) -> List[Any]:
+    with _locks_lock:
+        lock = _locks.setdefault(kind, threading.Lock())
+    with lock:
+        if kind not in _lists:
+            items = ocp_utils.api.list_paginated(
+                getattr(ocp_utils.api, kind), page_size
+            )
+            project = ocp_utils.records.projections.get(kind)
+            _lists[kind] = [project(item) for item in items] if project else list(items)
+        return _lists[kind]
+
+
+# The list of a kind if it was already listed, None otherwise
+def cached(kind: str) -> Optional[List[Any]]:
+    with _locks_lock:
+        return _lists.get(kind)
+
+
+# Lists a kind that only one check reads, the items are yielded as each page arrives
+# kwargs are sent with the LIST request, for example label_selector
+def iter_items(kind: str, **kwargs: Any) -> Iterator[Any]:
+    return ocp_utils.api.list_paginated(
+        getattr(ocp_utils.api, kind), page_size, **kwargs
+    )
@@ -0,0 +1,148 @@
+# Records where each check spends its time: wall and CPU time, requests to the API server and Prometheus,
+# oc debug runs, bytes received and how much the peak memory usage grew
+# Requests are attributed to the check that is being measured in the current context
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import contextlib
+import contextvars
+import json
+import resource
+import threading
+import time
+import urllib3
+from tabulate import tabulate
+
+
+class CheckTimings:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.api_calls = 0
+        self.api_seconds = 0.0
+        self.prometheus_calls = 0
+        self.prometheus_seconds = 0.0
+        self.oc_debug_calls = 0
+        self.oc_debug_seconds = 0.0
+        self.bytes_received = 0
+        self.max_rss_growth_kb = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+
+timings: List[CheckTimings] = []
+_lock = threading.Lock()
+_current: "contextvars.ContextVar[Optional[CheckTimings]]" = contextvars.ContextVar(
+    "current_check", default=None
+)
+
+
+def _max_rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+@contextlib.contextmanager
+def measure(name: str) -> Iterator[CheckTimings]:
+    stats = CheckTimings(name)
+    token = _current.set(stats)
+    wall = time.perf_counter()
+    # CPU time of the thread running the check, other checks may be running at the same time
+    cpu = time.thread_time()
+    max_rss = _max_rss_kb()
+    try:
+        yield stats
+    finally:
+        stats.wall_seconds = time.perf_counter() - wall
+        stats.cpu_seconds = time.thread_time() - cpu
+        stats.max_rss_growth_kb = _max_rss_kb() - max_rss
+        _current.reset(token)
+        with _lock:
+            timings.append(stats)
+
+
+# kind is one of "api", "prometheus" or "oc_debug"
+def record(kind: str, seconds: float = 0.0, received: int = 0) -> None:
+    stats = _current.get()
+    if stats is None:
+        return
+    with _lock:
+        setattr(stats, f"{kind}_calls", getattr(stats, f"{kind}_calls") + 1)
+        setattr(stats, f"{kind}_seconds", getattr(stats, f"{kind}_seconds") + seconds)
+        stats.bytes_received += received
+
+
+def record_received(received: int) -> None:
+    stats = _current.get()
+    if stats is None:
+        return
+    with _lock:
+        stats.bytes_received += received
+
+
+# Threads started by a check don't inherit its context, so work submitted to an executor is wrapped with this
+# A context can only be entered by one thread at a time, so each call runs in its own copy
+def in_context(fn: Callable[..., Any]) -> Callable[..., Any]:
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+
+# Counts the requests sent through a kubernetes ApiClient, and the size of their responses
+def instrument_api_client(api_client: Any) -> None:
+    call_api = api_client.call_api
+
+    def timed_call_api(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        response = call_api(*args, **kwargs)
+        record("api", time.perf_counter() - start)
+        # Newer clients return a RESTResponse that wraps the urllib3 response, older ones return the urllib3 response itself
+        # The body is only read after call_api returns, either all at once or in chunks for streamed responses
+        raw = getattr(response, "response", response)
+        if isinstance(raw, urllib3.response.HTTPResponse):
+            read = raw.read
+
+            def counted_read(*args: Any, **kwargs: Any) -> Any:
+                data = read(*args, **kwargs)
+                if data:
+                    record_received(len(data))
+                return data
+
+            raw.read = counted_read  # type: ignore
+        return response
+
+    api_client.call_api = timed_call_api
+
+
+def print_table() -> None:
+    rows = [
+        [
+            stats.name,
+            stats.wall_seconds,
+            stats.cpu_seconds,
+            stats.api_calls,
+            stats.api_seconds,
+            stats.prometheus_calls,
+            stats.prometheus_seconds,
+            stats.oc_debug_calls,
+            stats.bytes_received / 1024,
+            stats.max_rss_growth_kb / 1024,
+        ]
+        for stats in timings
+    ]
+    table_headers = [
+        "CHECK",
+        "WALL (S)",
+        "CPU (S)",
+        "API CALLS",
+        "API (S)",
+        "PROMETHEUS QUERIES",
+        "PROMETHEUS (S)",
+        "OC DEBUG",
+        "RECEIVED (KIB)",
+        "MAX RSS GROWTH (MIB)",
+    ]
+    print(tabulate(rows, headers=table_headers, floatfmt=".2f"))
+
+
+def write_file(path: str) -> None:
+    with open(path, "w") as f:
+        json.dump([stats.to_dict() for stats in timings], f, indent=2)
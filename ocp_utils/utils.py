@@ -1,12 +1,15 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import ocp_utils.api
+from ocp_utils.records import NodeRecord, PodRecord
 import argparse
+import threading
 from kubernetes import config  # type: ignore
 
 
-nodes: List[Dict[str, Any]] = []
-pods: List[Dict[str, Any]] = []
+nodes: List[NodeRecord] = []
 user_namespaces: List[Dict[str, Any]] = []
+_oc_debug_access: Optional[bool] = None
+_oc_debug_lock = threading.Lock()
 
 oc_colors = {
     "RED": "\033[0;31m",
@@ -42,18 +45,24 @@ def ERROR() -> str:
 
 # Getting a list of Ready nodes is useful if you want to use oc debug
 # There is no point trying to connect to a node that isn't up
-def ready_nodes() -> List[Dict[str, Any]]:
-    ready_nodes_list: List[Dict[str, Any]] = []
-    for node in nodes:  # type: Dict[str, Any]
-        # This if statement loops through the node status conditions, looking for one with a type of "Ready" and a status of "True"
-        if (
-            next(
-                item for item in node["status"]["conditions"] if item["type"] == "Ready"
-            )["status"]
-            == "True"
-        ):
-            ready_nodes_list.append(node)
-    return ready_nodes_list
+def ready_nodes() -> List[NodeRecord]:
+    return [node for node in nodes if node.is_ready()]
+
+
+# Pods are only fetched when a check needs them, there can be a lot of them
+def get_pods() -> List[PodRecord]:
+    return ocp_utils.snapshot.list_items("Pod")
+
+
+# oc debug needs permission to create pods, this is only asked the first time a check wants to use oc debug
+def can_oc_debug(args: argparse.Namespace) -> bool:
+    global _oc_debug_access
+    if args.skip_oc_debug:
+        return False
+    with _oc_debug_lock:
+        if _oc_debug_access is None:
+            _oc_debug_access = ocp_utils.api.has_oc_debug_access(args.request_timeout)
+        return _oc_debug_access
 
 
 def is_sno() -> bool:
@@ -118,9 +127,12 @@ def init(args: argparse.Namespace) -> None:
         ocp_utils.api.init_api(args, k8s_config)
     else:
         ocp_utils.api.init_must_gather(args)
-    nodes.extend(ocp_utils.api.Node.get()["items"])
-    pods.extend(ocp_utils.api.Pod.get()["items"])
-    for namespace in ocp_utils.api.Namespace.get()["items"]:  # type: Dict[str, Any]
+    ocp_utils.snapshot.page_size = args.page_size
+    ocp_utils.fanout.configure(
+        args.parallel_jobs, args.node_timeout, args.adaptive_jobs
+    )
+    nodes.extend(NodeRecord(node) for node in ocp_utils.snapshot.iter_items("Node"))
+    for namespace in ocp_utils.snapshot.iter_items("Namespace"):  # type: Dict[str, Any]
         if (
             not namespace["metadata"]["name"].startswith("kube-")
             and not namespace["metadata"]["name"].startswith("openshift-")
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import argparse
+import multiprocessing
 import sys
 import os
 import ocp_checks
@@ -53,7 +54,57 @@ def parse_args() -> argparse.Namespace:
         "--parallel-jobs",
         type=int,
         default=3,
-        help="How many oc debug jobs to run in parallel. Default=3",
+        help="How many oc debug jobs to run in parallel, over all checks. Default=3",
+    )
+    parser.add_argument(
+        "--adaptive-jobs",
+        action="store_true",
+        help="Start with fewer oc debug jobs, and run more of them while debug pods start quickly and don't fail, up to --parallel-jobs",
+    )
+    parser.add_argument(
+        "--node-timeout",
+        type=float,
+        default=300,
+        help="Timeout in seconds for the oc debug job on each node, 0 for no timeout. Default=300",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=0,
+        help="Timeout in seconds for the whole run, checks that haven't finished by then are reported as ERROR. 0 for no timeout. Default=0",
+    )
+    parser.add_argument(
+        "--check-timeout",
+        type=float,
+        default=0,
+        help="Timeout in seconds for each check, a check that takes longer is reported as ERROR and the run goes on. 0 for no timeout. Default=0",
+    )
+    parser.add_argument(
+        "--check-jobs",
+        type=int,
+        default=1,
+        help="How many checks to run in parallel. Default=1",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Show how long each check took, and what it spent that time on",
+    )
+    parser.add_argument(
+        "--timings-file",
+        type=str,
+        help="Write the timings of each check to this file, as JSON",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        help="Profile initialization and each check, and write the stats to <PROFILE>/<check>.pstats. Checks run one at a time when profiling",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=500,
+        help="How many resources each LIST request to the API server returns, 0 to list everything at once. Default=500",
     )
     parser.add_argument(
         "-i", "--incluster-config", action="store_true", help="Use in-cluster config"
@@ -68,7 +119,38 @@ def parse_args() -> argparse.Namespace:
         "--skip-prometheus", action="store_true", help=argparse.SUPPRESS
     )
     parser.add_argument(
-        "-m", "--must-gather", type=str, help="Path to a must-gather folder"
+        "--request-timeout",
+        type=float,
+        default=30,
+        help="Timeout in seconds for each request to the API server and Prometheus. Default=30",
+    )
+    parser.add_argument(
+        "--connect-timeout",
+        type=float,
+        default=5,
+        help="Timeout in seconds for each DNS lookup and connection of the cluster_dns check. Default=5",
+    )
+    parser.add_argument(
+        "--prometheus-url",
+        type=str,
+        help="URL of Prometheus, instead of the prometheus-k8s route in openshift-monitoring",
+    )
+    parser.add_argument(
+        "-m",
+        "--must-gather",
+        type=str,
+        help="Path to a must-gather folder or archive (.tar, .tar.gz, .tar.zst)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=ocp_utils.mgcache.default_cache_dir(),
+        help="Where parsed must-gather files and API discovery data are cached. Default=$XDG_CACHE_HOME/openshift-checks",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Don't cache parsed must-gather files or API discovery data",
     )
     parser.add_argument(
         "--entropy-threshold",
@@ -118,6 +200,10 @@ def parse_args() -> argparse.Namespace:
 def main() -> None:
     return_code = os.EX_OK
     args = parse_args()
+    ocp_utils.deadlines.configure(args.timeout, args.check_timeout)
+    if args.profile:
+        # The profiler only follows the thread it was started in
+        args.check_jobs = 1
     if args.must_gather:
         args.skip_oc_debug = True
         args.skip_prometheus = True
@@ -132,42 +218,64 @@ def main() -> None:
             ocp_utils.utils.oc_colors, ""
         )
 
+    # Loop through each of the check functions defined above
+    # Functions return a string that is displayed to the user (normally PASS or FAIL)
+    checks = [
+        fn
+        for fn in funcs
+        if ocp_utils.runner.check_name(fn) == args.single or not args.single
+    ]
+    func_count = len(checks)
+    selected = [
+        ocp_utils.runner.check_name(fn)
+        for fn in checks
+        if ocp_utils.runner.check_name(fn) not in args.skip.split(",")
+    ]
+    # Only the node probes and log patterns of the checks that will run are used, before the init reads the
+    # must-gather
+    ocp_utils.nodeprobe.select(selected)
+    ocp_utils.logscan.select(selected)
+
     try:
         if not args.results_only:
             print("Initializing...")
-        ocp_utils.utils.init(args)
+        with ocp_utils.timings.measure("init"), ocp_utils.profiling.profile(
+            args, "init"
+        ):
+            ocp_utils.utils.init(args)
     except Exception as e:
         print(f"Error {e.__class__.__name__} in initialization:\n{e}")
         sys.exit(os.EX_OSERR)
-    # Loop through each of the check functions defined above
-    # Functions return a string that is displayed to the user (normally PASS or FAIL)
-    func_count = 0
-    for fn in funcs:
-        check_name = fn.__module__.split(".")[1]
-        if check_name == args.single or not args.single:
-            func_count += 1
-            if not args.results_only:
-                print(f"\nRunning check: {check_name}")
-            if check_name in args.skip.split(","):
-                print(f"{check_name: <30} {ocp_utils.utils.SKIP()}")
-            else:
-                try:
-                    result = fn(args)
-                except Exception as e:
-                    print(
-                        f"{ocp_utils.utils.oc_colors['RED']}Error {e.__class__.__name__} in check {check_name}:{ocp_utils.utils.oc_colors['ENDC']}\n{e}"
-                    )
-                    continue
-                print(f"{check_name: <30} {result}")
-                if result == ocp_utils.utils.FAIL() and return_code != os.EX_OSERR:
-                    return_code = os.EX_SOFTWARE
-                elif result == ocp_utils.utils.ERROR():
-                    return_code = os.EX_OSERR
+
+    def announce(check_name: str) -> None:
+        if not args.results_only:
+            print(f"\nRunning check: {check_name}")
+
+    for check in ocp_utils.runner.run_checks(checks, args, announce):
+        if check.error is not None:
+            print(
+                f"{ocp_utils.utils.oc_colors['RED']}Error {check.error.__class__.__name__} in check {check.name}:{ocp_utils.utils.oc_colors['ENDC']}\n{check.error}"
+            )
+            continue
+        print(f"{check.name: <30} {check.result}")
+        if check.result == ocp_utils.utils.FAIL() and return_code != os.EX_OSERR:
+            return_code = os.EX_SOFTWARE
+        elif check.result == ocp_utils.utils.ERROR():
+            return_code = os.EX_OSERR
+    if args.timings:
+        print()
+        ocp_utils.timings.print_table()
+    if args.timings_file:
+        ocp_utils.timings.write_file(args.timings_file)
     if args.single and func_count == 0:
         print("Check not found")
         return_code = os.EX_USAGE
+    # Checks that timed out can leave oc commands behind, they are stopped so that their debug pods get deleted
+    ocp_utils.fanout.terminate_all()
     sys.exit(return_code)
 
 
 if __name__ == "__main__":
+    # The must-gather parser spawns worker processes, which the PyInstaller binary has to hand over to them
+    multiprocessing.freeze_support()
     main()